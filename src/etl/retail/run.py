@@ -6,6 +6,7 @@ from ...utils.logger import get_logger
 from .extract import extract_retail
 from .transform import (
     transform_sales,
+    transform_sales_chunks,
     transform_products,
     transform_stores,
     join_sales_products_stores,
@@ -26,27 +27,44 @@ class RetailETLResult:
     enriched_shape: tuple[int, int]
 
 
-def run_retail_etl(batch_size: int = 1000) -> RetailETLResult:
+def run_retail_etl(batch_size: int = 1000, sales_chunksize: int | None = None) -> RetailETLResult:
     """
     Run full ETL for  Alan's retail dataset:
       - Extract: sales, products, stores
       - Transform: clean each
       - Join: sales + products + stores
       - Load: 4 tables into Postgres
+
+    If sales_chunksize is set, sales.csv is read and cleaned in chunks of
+    that many rows to cap peak memory on large files.
     """
     logger.info(
         "[-RUN] Starting  retail ETL pipeline (batch_size=%d)",
         batch_size,
     )
 
-    # Extract
-    sales_raw, products_raw, stores_raw = extract_retail()
-    sales_raw_shape = sales_raw.shape
+    # Extract + Transform
+    if sales_chunksize:
+        sales_chunks, products_raw, stores_raw = extract_retail(sales_chunksize=sales_chunksize)
+        raw_rows, raw_cols = 0, 0
+
+        def _counted(chunks):
+            nonlocal raw_rows, raw_cols
+            for chunk in chunks:
+                raw_rows += len(chunk)
+                raw_cols = chunk.shape[1]
+                yield chunk
+
+        with sales_chunks:
+            sales_clean = transform_sales_chunks(_counted(sales_chunks))
+        sales_raw_shape = (raw_rows, raw_cols)
+    else:
+        sales_raw, products_raw, stores_raw = extract_retail()
+        sales_raw_shape = sales_raw.shape
+        sales_clean = transform_sales(sales_raw)
     products_raw_shape = products_raw.shape
     stores_raw_shape = stores_raw.shape
 
-    # Transform
-    sales_clean = transform_sales(sales_raw)
     products_clean = transform_products(products_raw)
     stores_clean = transform_stores(stores_raw)
     enriched = join_sales_products_stores(sales_clean, products_clean, stores_clean)
@@ -1,7 +1,9 @@
 # src/etl/retail_transform.py
 from __future__ import annotations
-from typing import List
+import warnings
+from typing import Iterable, List
 
+import numpy as np
 import pandas as pd
 from pandas.api import types as ptypes
 
@@ -16,10 +18,11 @@ def _standardize_key(
     target_name: str,
 ) -> pd.DataFrame:
     """
-    If any candidate column exists, copy it to a standardized column name (string).
+    If any candidate column exists, copy it to a standardized column name
+    (stripped strings, stored as a category so joins hash integer codes).
     Example: candidates=['product_id','ProductID'] -> target 'product_id'
+    Assigns the column on the frame it is given; callers own the copy.
     """
-    df = df.copy()
     found = [c for c in candidates if c in df.columns]
     if not found:
         logger.warning(
@@ -33,7 +36,12 @@ def _standardize_key(
         "[TRANSFORM] Standardizing key column '%s' -> '%s'",
         src, target_name,
     )
-    df[target_name] = df[src].astype(str).str.strip()
+    # Strip only the distinct values, then map the row codes onto the
+    # stripped categories instead of stripping every row
+    codes, uniques = pd.factorize(df[src], use_na_sentinel=False)
+    stripped = pd.Series(uniques).astype(str).str.strip()
+    key_codes, categories = pd.factorize(stripped, sort=True)
+    df[target_name] = pd.Categorical.from_codes(key_codes[codes], categories=categories)
     return df
 
 
@@ -63,40 +71,75 @@ def _remove_duplicates(df: pd.DataFrame, label: str, subset: List[str] | None =
     return df_clean
 
 
-def _fill_na(df: pd.DataFrame, label: str) -> pd.DataFrame:
+def _column_mode(series: pd.Series):
+    """
+    Most frequent non-NA value (None if the column is all NA).
+    Single hashed pass (factorize + bincount) instead of Series.mode's
+    sort; ties are broken like Series.mode (smallest value first).
+    """
+    codes, uniques = pd.factorize(series)
+    codes = codes[codes >= 0]
+    if codes.size == 0:
+        return None
+    counts = np.bincount(codes, minlength=len(uniques))
+    candidates = uniques[counts == counts.max()]
+    if len(candidates) == 1:
+        return candidates[0]
+    return pd.Series(candidates).mode().iloc[0]
+
+
+def _fill_na(
+    df: pd.DataFrame,
+    label: str,
+    numeric_cols: List[str] | None = None,
+) -> pd.DataFrame:
     """
     Fill NA values:
       - numeric: median
       - non-numeric: mode
+    Fill values are computed for all NA columns at once and applied with a
+    single fillna call. numeric_cols can be passed in to skip dtype detection.
     """
-    df_clean = df.copy()
-    for col in df_clean.columns:
-        series = df_clean[col]
-        if series.isna().sum() == 0:
-            continue
+    na_counts = df.isna().sum()
+    na_cols = na_counts.index[na_counts > 0]
+    if na_cols.empty:
+        return df
 
-        if ptypes.is_numeric_dtype(series):
-            median_val = series.median()
-            df_clean[col] = series.fillna(median_val)
-            logger.info(
-                "[TRANSFORM] [%s] Filled NA in numeric column '%s' with median=%s",
-                label, col, median_val,
-            )
-        else:
-            modes = series.mode(dropna=True)
-            if len(modes) > 0:
-                mode_val = modes.iloc[0]
-                df_clean[col] = series.fillna(mode_val)
-                logger.info(
-                    "[TRANSFORM] [%s] Filled NA in non-numeric column '%s' with mode=%r",
-                    label, col, mode_val,
-                )
-            else:
-                logger.info(
-                    "[TRANSFORM] [%s] Could not determine mode for '%s'; leaving NA",
-                    label, col,
-                )
-    return df_clean
+    if numeric_cols is None:
+        numeric_na_cols = df[na_cols].select_dtypes(include="number").columns
+    else:
+        numeric_na_cols = na_cols.intersection(numeric_cols, sort=False)
+    other_na_cols = na_cols.difference(numeric_na_cols, sort=False)
+
+    fill_values = {}
+    if not numeric_na_cols.empty:
+        arr = df[numeric_na_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        with warnings.catch_warnings():
+            # all-NA columns give NaN (left unfilled) without the warning
+            warnings.simplefilter("ignore", RuntimeWarning)
+            medians = np.nanmedian(arr, axis=0)
+        fill_values.update(
+            {col: med for col, med in zip(numeric_na_cols, medians) if not np.isnan(med)}
+        )
+    for col in other_na_cols:
+        mode_val = _column_mode(df[col])
+        if mode_val is not None:
+            fill_values[col] = mode_val
+
+    unfilled = [c for c in na_cols if c not in fill_values]
+    if unfilled:
+        logger.info(
+            "[TRANSFORM] [%s] Could not determine median/mode for %s; leaving NA",
+            label, unfilled,
+        )
+    if not fill_values:
+        return df
+
+    logger.info(
+        "[TRANSFORM] [%s] Filled NA in %d columns (median for numeric, mode otherwise): %s",
+        label, len(fill_values), fill_values,
+    )
+    return df.fillna(fill_values)
 
 
 def _drop_na_rows(df: pd.DataFrame, label: str) -> pd.DataFrame:
@@ -112,33 +155,40 @@ def _drop_na_rows(df: pd.DataFrame, label: str) -> pd.DataFrame:
     return df_clean
 
 
-def _remove_outliers_iqr(df: pd.DataFrame, label: str, factor: float = 1.5) -> pd.DataFrame:
+def _remove_outliers_iqr(
+    df: pd.DataFrame,
+    label: str,
+    factor: float = 1.5,
+    numeric_cols: List[str] | None = None,
+) -> pd.DataFrame:
     """
     Remove outliers for numeric columns using IQR.
+    numeric_cols can be passed in to skip dtype detection.
     """
-    df_clean = df.copy()
-    numeric_cols = [c for c in df_clean.columns if ptypes.is_numeric_dtype(df_clean[c])]
+    df_clean = df
+    if numeric_cols is None:
+        numeric_cols = [c for c in df_clean.columns if ptypes.is_numeric_dtype(df_clean[c])]
+    else:
+        numeric_cols = [c for c in numeric_cols if c in df_clean.columns]
 
     if not numeric_cols:
         logger.info("[TRANSFORM] [%s] No numeric columns for outlier removal; skipping.", label)
         return df_clean
 
     before = len(df_clean)
-    mask = pd.Series(True, index=df_clean.index)
 
-    for col in numeric_cols:
-        series = df_clean[col]
-        if series.empty:
-            continue
-        q1 = series.quantile(0.25)
-        q3 = series.quantile(0.75)
-        iqr = q3 - q1
-        if iqr == 0:
-            continue
-        lower = q1 - factor * iqr
-        upper = q3 + factor * iqr
-        col_mask = series.between(lower, upper) | series.isna()
-        mask &= col_mask
+    # Both quartiles for every numeric column in one call (one sort per column)
+    quartiles = df_clean[numeric_cols].quantile([0.25, 0.75]).to_numpy(dtype=np.float64)
+    q1, q3 = quartiles[0], quartiles[1]
+    iqr = q3 - q1
+    lower = q1 - factor * iqr
+    upper = q3 + factor * iqr
+
+    # One broadcast comparison over the (rows x numeric cols) block;
+    # zero-IQR columns and NA cells never exclude a row
+    arr = df_clean[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = (iqr == 0) | np.isnan(arr) | ((arr >= lower) & (arr <= upper))
+    mask = keep.all(axis=1)
 
     df_clean = df_clean[mask]
     after = len(df_clean)
@@ -151,25 +201,64 @@ def _remove_outliers_iqr(df: pd.DataFrame, label: str, factor: float = 1.5) -> p
     return df_clean
 
 
-def _parse_dates_if_present(df: pd.DataFrame, label: str) -> pd.DataFrame:
+def _date_columns(df: pd.DataFrame) -> List[str]:
+    """
+    Columns whose name contains 'date' (case-insensitive).
+    """
+    return [c for c in df.columns if "date" in c.lower()]
+
+
+# Tried in order against a sample; month-first before day-first to match
+# pandas' default reading of ambiguous dates
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%m/%d/%Y", "%d/%m/%Y"]
+
+
+def _detect_date_format(series: pd.Series, sample_size: int = 32) -> str | None:
+    """
+    First format in DATE_FORMATS that parses a sample of the non-NA values,
+    or None (let pandas infer) if none fits or the column is not text.
+    """
+    if not (ptypes.is_object_dtype(series) or ptypes.is_string_dtype(series)):
+        return None
+    sample = series.dropna().iloc[:sample_size]
+    if sample.empty:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt, errors="raise")
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def _parse_dates_if_present(
+    df: pd.DataFrame,
+    label: str,
+    date_cols: List[str] | None = None,
+) -> pd.DataFrame:
     """
     Try to parse date-like columns into datetime.
-    We'll look for names containing 'date' (case-insensitive).
+    We'll look for names containing 'date' (case-insensitive),
+    unless date_cols is passed in.
     """
-    df = df.copy()
-    for col in df.columns:
-        if "date" in col.lower():
-            try:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
-                logger.info(
-                    "[TRANSFORM] [%s] Parsed column '%s' as datetime",
-                    label, col,
-                )
-            except Exception as e:
-                logger.warning(
-                    "[TRANSFORM] [%s] Failed to parse '%s' as datetime: %s",
-                    label, col, e,
-                )
+    if date_cols is None:
+        date_cols = _date_columns(df)
+    for col in date_cols:
+        if col not in df.columns:
+            continue
+        try:
+            fmt = _detect_date_format(df[col])
+            df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce", cache=True)
+            logger.info(
+                "[TRANSFORM] [%s] Parsed column '%s' as datetime",
+                label, col,
+            )
+        except Exception as e:
+            logger.warning(
+                "[TRANSFORM] [%s] Failed to parse '%s' as datetime: %s",
+                label, col, e,
+            )
     return df
 
 
@@ -186,55 +275,145 @@ def transform_sales(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     label = "sales"
     logger.info("[TRANSFORM] Cleaning sales data...")
-    df = sales_df.copy()
+    # Single shallow copy: helpers only replace/add whole columns, so the
+    # caller's frame is never modified.
+    df = sales_df.copy(deep=False)
 
     # standardize keys we know this dataset uses
     df = _standardize_key(df, ["product_id", "productID", "ProductID"], "product_id")
     df = _standardize_key(df, ["store_id", "StoreID", "storeId"], "store_id")
 
+    # Date columns detected once, before cleaning
+    date_cols = _date_columns(df)
+
     df = _drop_all_na_columns(df, label)
     df = _remove_duplicates(df, label, subset=["product_id", "store_id"] if "product_id" in df.columns and "store_id" in df.columns else None)
     # df = _fill_na(df, label)
     df = _drop_na_rows(df, label)
     # df = _remove_outliers_iqr(df, label)
-    df = _parse_dates_if_present(df, label)
+    df = _parse_dates_if_present(df, label, date_cols=date_cols)
 
     logger.info("[TRANSFORM] Final sales shape: %s", df.shape)
     return df
 
 
-def transform_products(products_df: pd.DataFrame) -> pd.DataFrame:
+def transform_sales_chunks(sales_chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
     """
-    Clean product_hierarchy data.
+    Chunked variant of transform_sales for sales files too large to hold raw.
+
+    Row-local work (key standardization) and duplicate removal run per chunk,
+    so each raw chunk can be released as soon as it is processed. The stages
+    that need the whole table (all-NA columns, final dedup, NA rows, dates)
+    run once on the concatenated result, in the same order as transform_sales,
+    so the output matches transform_sales on the full frame.
     """
-    label = "products"
-    logger.info("[TRANSFORM] Cleaning product_hierarchy data...")
-    df = products_df.copy()
-    df = _standardize_key(df, ["product_id", "ProductID", "productID"], "product_id")
+    label = "sales"
+    logger.info("[TRANSFORM] Cleaning sales data in chunks...")
+    key_subset = None
+    category_cols: List[str] = []
+    cleaned_chunks = []
+
+    for chunk in sales_chunks:
+        # Shallow copy per chunk, as in transform_sales: the key columns are
+        # assigned onto it, never onto the caller's frame
+        chunk = chunk.copy(deep=False)
+        chunk = _standardize_key(chunk, ["product_id", "productID", "ProductID"], "product_id")
+        chunk = _standardize_key(chunk, ["store_id", "StoreID", "storeId"], "store_id")
+        if not cleaned_chunks:
+            key_subset = (
+                ["product_id", "store_id"]
+                if "product_id" in chunk.columns and "store_id" in chunk.columns
+                else None
+            )
+            category_cols = chunk.select_dtypes(include="category").columns.tolist()
+        # keep="first" per chunk and again globally keeps exactly the global firsts
+        cleaned_chunks.append(chunk.drop_duplicates(subset=key_subset))
+
+    if not cleaned_chunks:
+        return pd.DataFrame()
+
+    df = pd.concat(cleaned_chunks, ignore_index=False)
+    del cleaned_chunks
+    # per-chunk categories differ, so concat falls back to object; restore them
+    for col in category_cols:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    date_cols = _date_columns(df)
     df = _drop_all_na_columns(df, label)
-    df = _remove_duplicates(df, label, subset=["product_id"] if "product_id" in df.columns else None)
-    # df = _fill_na(df, label)
+    df = _remove_duplicates(df, label, subset=key_subset)
     df = _drop_na_rows(df, label)
-    logger.info("[TRANSFORM] Final product_hierarchy shape: %s", df.shape)
+    df = _parse_dates_if_present(df, label, date_cols=date_cols)
+
+    logger.info("[TRANSFORM] Final sales shape: %s", df.shape)
     return df
 
 
-def transform_stores(stores_df: pd.DataFrame) -> pd.DataFrame:
+def _transform_dim(
+    dim_df: pd.DataFrame,
+    key_candidates: List[str],
+    target: str,
+    label: str,
+    name: str,
+) -> pd.DataFrame:
     """
-    Clean store_cities data.
+    Shared cleaning for the dimension tables (products, stores):
+    standardize the key, drop all-NA columns, dedupe on the key, drop NA rows.
     """
-    label = "stores"
-    logger.info("[TRANSFORM] Cleaning store_cities data...")
-    df = stores_df.copy()
-    df = _standardize_key(df, ["store_id", "StoreID", "storeId"], "store_id")
+    logger.info("[TRANSFORM] Cleaning %s data...", name)
+    df = dim_df.copy(deep=False)
+    df = _standardize_key(df, key_candidates, target)
     df = _drop_all_na_columns(df, label)
-    df = _remove_duplicates(df, label, subset=["store_id"] if "store_id" in df.columns else None)
+    df = _remove_duplicates(df, label, subset=[target] if target in df.columns else None)
     # df = _fill_na(df, label)
     df = _drop_na_rows(df, label)
-    logger.info("[TRANSFORM] Final store_cities shape: %s", df.shape)
+    logger.info("[TRANSFORM] Final %s shape: %s", name, df.shape)
     return df
 
 
+def transform_products(products_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean product_hierarchy data.
+    """
+    return _transform_dim(
+        products_df, ["product_id", "ProductID", "productID"], "product_id",
+        "products", "product_hierarchy",
+    )
+
+
+def transform_stores(stores_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean store_cities data.
+    """
+    return _transform_dim(
+        stores_df, ["store_id", "StoreID", "storeId"], "store_id",
+        "stores", "store_cities",
+    )
+
+
+def _unify_key_categories(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    key: str,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    If the join key is categorical on both sides, give both the same
+    categories so merge joins on the integer codes instead of the strings.
+    """
+    if not (
+        isinstance(left[key].dtype, pd.CategoricalDtype)
+        and isinstance(right[key].dtype, pd.CategoricalDtype)
+    ):
+        return left, right
+
+    cats = left[key].cat.categories.union(right[key].cat.categories)
+    left = left.copy(deep=False)
+    right = right.copy(deep=False)
+    left[key] = left[key].cat.set_categories(cats)
+    right[key] = right[key].cat.set_categories(cats)
+    return left, right
+
+
 def join_sales_products_stores(
     sales_df: pd.DataFrame,
     products_df: pd.DataFrame,
@@ -242,11 +421,13 @@ def join_sales_products_stores(
 ) -> pd.DataFrame:
     """
     Join sales with products on product_id, and with stores on store_id.
+    Each merge already builds a new frame, so sales_df is not copied up front.
     """
-    df = sales_df.copy()
+    df = sales_df
 
     if "product_id" in df.columns and "product_id" in products_df.columns:
         logger.info("[TRANSFORM] Joining sales + products on product_id")
+        df, products_df = _unify_key_categories(df, products_df, "product_id")
         df = df.merge(
             products_df,
             on="product_id",
@@ -260,6 +441,7 @@ def join_sales_products_stores(
 
     if "store_id" in df.columns and "store_id" in stores_df.columns:
         logger.info("[RETAIL-ETL-TRANSFORM] Joining sales + stores on store_id")
+        df, stores_df = _unify_key_categories(df, stores_df, "store_id")
         df = df.merge(
             stores_df,
             on="store_id",
@@ -1,11 +1,15 @@
 # src/main.py
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, Request
+import pandas as pd
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from src.utils.db import init_metadata_tables
-from src.utils.logger import get_logger,setup_logging
+from src.utils.config import config
+from src.utils.db import init_metadata_tables, close_db_connection
+from src.utils.helpers import DFCache
+from src.utils.logger import get_logger, setup_logging, shutdown_logging
 from .web.routes import router as web_router 
 
 # --------------------------
@@ -15,6 +19,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent  # project_root/src -> project
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
 
+# Copy-on-write: drop(columns=...) and other derived frames in the cleaning
+# routes share blocks with their parent until one of them is written to
+pd.set_option("mode.copy_on_write", True)
+
 # App logger (separate name from ETL, but same config)
 setup_logging()
 logger = get_logger(__name__)
@@ -23,21 +31,30 @@ logger.info("Staring ETL BUILder Application")
 # --------------------------
 # FastAPI App
 # --------------------------
-app = FastAPI(title="ETL Builder")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Init sources table
+    init_metadata_tables()
+    yield
+    close_db_connection()
+    shutdown_logging()
 
 
-# Init sources table
-init_metadata_tables()
+app = FastAPI(title="ETL Builder", lifespan=lifespan)
 
 # --------------------------
 # Jinja Templates
 # --------------------------
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+# Without auto-reload Jinja skips the mtime check on every template lookup
+templates.env.auto_reload = bool(config.get("web", {}).get("template_auto_reload", True))
 app.state.templates = templates
 
 # In-memory workspace: DataFrames per source_id
-# { source_id (int): pandas.DataFrame }
-app.state.df_store = {}  # type: ignore[attr-defined]
+# { source_id (int): pandas.DataFrame }, bounded by web.df_store_max_mb
+app.state.df_store = DFCache(  # type: ignore[attr-defined]
+    max_bytes=int(config.get("web", {}).get("df_store_max_mb", 1024)) << 20
+)
 app.state.pipeline_store = {}    # type: ignore[attr-defined]
 
 # --------------------------
@@ -49,20 +66,35 @@ app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 # --------------------------
 # Request Logging Middleware
 # --------------------------
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info("Incoming request: %s %s", request.method, request.url.path)
-
-    response = await call_next(request)
-
-    logger.info(
-        "Completed request: %s %s -> %s",
-        request.method,
-        request.url.path,
-        response.status_code,
-    )
-
-    return response
+# A plain ASGI middleware rather than @app.middleware("http"): the latter
+# re-streams every response body through an in-memory channel, which costs
+# an extra copy per chunk on large CSV downloads.
+class RequestLoggingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        logger.info("Incoming request: %s %s", method, path)
+
+        async def send_logging_status(message):
+            if message["type"] == "http.response.start":
+                logger.info(
+                    "Completed request: %s %s -> %s",
+                    method,
+                    path,
+                    message["status"],
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_logging_status)
+
+
+app.add_middleware(RequestLoggingMiddleware)
 
 # --------------------------
 # Routers
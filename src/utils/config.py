@@ -1,5 +1,5 @@
 import yaml
-import os
+from functools import lru_cache
 from pathlib import Path
 
 # Get project root: .../Revature-Cognizant-Project1
@@ -7,9 +7,12 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
 CONFIG_PATH = PROJECT_ROOT / "config" / "config.yaml"
 
+@lru_cache(maxsize=1)
 def load_config():
-    config_path = os.path.join(CONFIG_PATH)
-    with open(config_path,"r") as file:
+    """
+    Parse config.yaml once; later calls return the cached dict.
+    """
+    with open(CONFIG_PATH, "r") as file:
         return yaml.safe_load(file)
-    
+
 config = load_config()
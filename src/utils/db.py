@@ -1,29 +1,94 @@
-from typing import List, Dict, Optional, Iterable
+from typing import List, Dict, Optional, Iterable, Iterator
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from itertools import islice
 import psycopg
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 from typing import Iterable
 from src.utils.config import config
 from src.utils.logger import get_logger
+import numpy as np
 import pandas as pd
 from psycopg import sql
 
 logger = get_logger(__name__)
 
+# Rows encoded per COPY write in load_dataframe_to_table
+COPY_CHUNK_ROWS = 50_000
+
+# Rows per multi-row INSERT when COPY is unavailable, capped so a statement
+# stays under PostgreSQL's 65535 bind-parameter limit
+INSERT_BATCH_ROWS = 1000
+PG_MAX_PARAMS = 65535
+
+# PostgreSQL column type per numpy dtype kind; anything else is TEXT
+_KIND_TO_PG = {
+    "i": "BIGINT",
+    "u": "BIGINT",
+    "f": "DOUBLE PRECISION",
+    "b": "BOOLEAN",
+    "M": "TIMESTAMPTZ",
+}
+
+
+def _pg_type(dtype) -> str:
+    return _KIND_TO_PG.get(dtype.kind, "TEXT")
+
+
+# Connections come from a pool opened on first use. Each get_db_connection
+# block checks out its own connection, so concurrent requests run their
+# statements in parallel instead of queueing behind one shared connection.
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            db = config["database"]
+            _pool = ConnectionPool(
+                kwargs={
+                    "host": db["host"],
+                    "port": db["port"],
+                    "dbname": db["name"],
+                    "user": db["user"],
+                    "password": db["password"],
+                },
+                min_size=db.get("pool_min_size", 1),
+                max_size=db.get("pool_max_size", 5),
+                timeout=db.get("pool_timeout", 30),
+                check=ConnectionPool.check_connection,
+                open=True,
+            )
+            logger.info("Opened database connection pool")
+        return _pool
+
+
+@contextmanager
 def get_db_connection():
-    db = config["database"]
-    try:
-        conn = psycopg.connect(
-            host=db["host"],
-            port=db["port"],
-            dbname=db["name"],
-            user=db["user"],
-            password=db["password"],
-        )
-        logger.info("Successfully connected to database")
-        return conn
-    except Exception as e:
-        logger.exception("Exception occurred while connecting to database")
-        return None
+    """
+    Yield a pooled connection. Like `with psycopg.connect() as conn`, the
+    transaction is committed on success and rolled back on error; the
+    connection then goes back to the pool.
+    Raises psycopg_pool.PoolTimeout when no connection can be obtained.
+    """
+    with _get_pool().connection() as conn:
+        yield conn
+
+
+def close_db_connection() -> None:
+    """
+    Close the connection pool. Call this once at app shutdown.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            logger.info("Closed database connection pool")
+        _pool = None
 
 def init_metadata_tables() -> None:
     """
@@ -160,18 +225,49 @@ def delete_data_sources(ids: Iterable[int]) -> None:
     if not ids:
         return
 
-    sql = "DELETE FROM data_sources WHERE id = %s"
+    sql = "DELETE FROM data_sources WHERE id = ANY(%s)"
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
-                for sid in ids:
-                    cur.execute(sql, (sid,))
+                cur.execute(sql, (ids,))
             conn.commit()
         logger.info("Deleted %d data_sources rows: %s", len(ids), ids)
     except Exception:
         logger.exception("Failed to delete data sources: %s", ids)
         raise
 
+def delete_data_sources_and_list(ids: Iterable[int]) -> List[Dict]:
+    """
+    Delete data_sources records by ID and return the remaining sources
+    (same shape and order as get_all_data_sources) in one statement.
+    """
+    ids = list(ids)
+    if not ids:
+        return get_all_data_sources()
+
+    # The outer SELECT sees the table as it was before the DELETE, so the
+    # deleted ids are filtered out explicitly
+    sql = """
+    WITH deleted AS (
+        DELETE FROM data_sources WHERE id = ANY(%s) RETURNING id
+    )
+    SELECT id, name, source_type, original_name, row_count, column_count, status, created_at
+    FROM data_sources
+    WHERE id NOT IN (SELECT id FROM deleted)
+    ORDER BY created_at DESC;
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (ids,))
+                rows = cur.fetchall()
+                col_names = [desc[0] for desc in cur.description]
+        logger.info("Deleted data_sources rows: %s", ids)
+        return [dict(zip(col_names, row)) for row in rows]
+    except Exception:
+        logger.exception("Failed to delete data sources: %s", ids)
+        raise
+
 def get_data_source_by_id(source_id: int) -> Optional[Dict]:
     """
     Fetch a single data_source row by ID as a dict, or None if not found.
@@ -195,6 +291,70 @@ def get_data_source_by_id(source_id: int) -> Optional[Dict]:
         logger.exception("Failed to fetch data source by id=%s", source_id)
         raise
 
+def _rows_from_df(df: pd.DataFrame) -> Iterator[tuple]:
+    """
+    Row tuples of df for parameterized INSERTs, with NaN/NaT -> None so the
+    driver sends proper NULLs. Values are converted column by column
+    (one tolist() per column) and zipped, instead of boxing each row
+    through itertuples.
+    """
+    columns = []
+    for i, dtype in enumerate(df.dtypes):
+        series = df.iloc[:, i]
+        if isinstance(dtype, np.dtype) and dtype.kind in "iub":
+            # cannot hold nulls
+            columns.append(series.to_numpy().tolist())
+        elif isinstance(dtype, np.dtype) and dtype.kind == "f":
+            arr = series.to_numpy()
+            mask = np.isnan(arr)
+            columns.append(np.where(mask, None, arr).tolist() if mask.any() else arr.tolist())
+        else:
+            columns.append(series.astype(object).where(series.notna(), None).tolist())
+    return zip(*columns)
+
+
+# COPY BINARY framing: signature + flags + header-extension length, and the
+# -1 field count that ends the stream
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + b"\x00" * 8
+_PGCOPY_TRAILER = b"\xff\xff"
+
+# Wire format per numpy kind, matching the column types from _KIND_TO_PG
+_KIND_TO_BINARY = {"i": ">i8", "u": ">i8", "f": ">f8", "b": "?"}
+
+
+def _binary_copy_dtype(df: pd.DataFrame) -> Optional[np.dtype]:
+    """
+    Packed record dtype laying out one COPY BINARY tuple per row
+    (field count, then length + big-endian value per column), or None when
+    df needs the CSV path: non-numeric columns, float NaNs (NULLs),
+    float32 (CSV keeps its short repr) or uint64 (may not fit BIGINT).
+    """
+    fields = [("n", ">i2")]
+    for i, dtype in enumerate(df.dtypes):
+        if not isinstance(dtype, np.dtype) or dtype.kind not in _KIND_TO_BINARY:
+            return None
+        if dtype.kind == "f" and (dtype.itemsize != 8 or np.isnan(df.iloc[:, i].to_numpy()).any()):
+            return None
+        if dtype.kind == "u" and dtype.itemsize == 8:
+            return None
+        fields.append((f"l{i}", ">i4"))
+        fields.append((f"v{i}", _KIND_TO_BINARY[dtype.kind]))
+    return np.dtype(fields)
+
+
+def _binary_copy_rows(df: pd.DataFrame, rec_dtype: np.dtype) -> bytes:
+    """
+    Encode df's rows as COPY BINARY tuples, one column assignment at a time.
+    """
+    rec = np.empty(len(df), dtype=rec_dtype)
+    rec["n"] = df.shape[1]
+    for i in range(df.shape[1]):
+        value = f"v{i}"
+        rec[f"l{i}"] = rec_dtype[value].itemsize
+        rec[value] = df.iloc[:, i].to_numpy()
+    return rec.tobytes()
+
+
 def load_dataframe_to_table(
     df: pd.DataFrame,
     table_name: str,
@@ -206,31 +366,21 @@ def load_dataframe_to_table(
     mode:
         - "overwrite": drop table if exists, create new, insert all rows
         - "append": create table if not exists, append rows
+
+    Rows are streamed with COPY FROM STDIN (binary format for all-numeric
+    frames without NULLs, CSV otherwise); batched multi-row INSERTs are
+    only used when the cursor has no COPY support.
     """
     if df.empty:
         logger.warning("[DB-LOAD] DataFrame for table '%s' is empty. Nothing to load.", table_name)
         return
 
-    # Validate table name (very basic)
-    if not str(table_name).replace("_", "").isalnum():
-        raise ValueError(f"Invalid table name: {table_name}")
+    _validate_table_name(table_name)
 
     logger.info("[DB-LOAD] Loading DataFrame into table '%s' (mode=%s)", table_name, mode)
 
-    # Infer PostgreSQL column types
-    def infer_pg_type(dtype):
-        if pd.api.types.is_integer_dtype(dtype):
-            return "BIGINT"
-        if pd.api.types.is_float_dtype(dtype):
-            return "DOUBLE PRECISION"
-        if pd.api.types.is_bool_dtype(dtype):
-            return "BOOLEAN"
-        if pd.api.types.is_datetime64_any_dtype(dtype):
-            return "TIMESTAMPTZ"
-        return "TEXT"
-
     columns = list(df.columns)
-    col_types = [infer_pg_type(df[col].dtype) for col in columns]
+    col_types = [_pg_type(dtype) for dtype in df.dtypes]
 
     with get_db_connection() as conn:
         with conn.cursor() as cur:
@@ -264,19 +414,68 @@ def load_dataframe_to_table(
             cur.execute(create_stmt)
             logger.info("[DB-LOAD] Created table '%s' with schema.", table_name)
 
-            # Prepare INSERT statement
-            placeholders = sql.SQL(", ").join(sql.Placeholder() for _ in columns)
-            insert_stmt = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
-                sql.Identifier(table_name),
-                sql.SQL(", ").join(sql.Identifier(c) for c in columns),
-                placeholders,
-            )
-
-            # Insert all rows
-            rows = [tuple(row) for row in df.itertuples(index=False, name=None)]
-            cur.executemany(insert_stmt, rows)
+            rec_dtype = _binary_copy_dtype(df) if hasattr(cur, "copy") else None
+            if rec_dtype is not None:
+                # All-numeric frame without NULLs: COPY in binary format, so
+                # the server does no text parsing and no CSV is formatted
+                copy_stmt = sql.SQL(
+                    "COPY {} ({}) FROM STDIN (FORMAT BINARY)"
+                ).format(
+                    sql.Identifier(table_name),
+                    sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+                )
+                with cur.copy(copy_stmt) as cp:
+                    cp.write(_PGCOPY_HEADER)
+                    for start in range(0, len(df), COPY_CHUNK_ROWS):
+                        chunk = df.iloc[start:start + COPY_CHUNK_ROWS]
+                        cp.write(_binary_copy_rows(chunk, rec_dtype))
+                    cp.write(_PGCOPY_TRAILER)
+
+                logger.info("[DB-LOAD] Copied %d rows into '%s' (binary)", len(df), table_name)
+            elif hasattr(cur, "copy"):
+                # Bulk path: COPY ... FROM STDIN skips the INSERT parser entirely.
+                # Rows are encoded column-wise by pandas' CSV writer in chunks,
+                # so no per-row Python tuples are built. NaN/NaT -> \N (NULL).
+                copy_stmt = sql.SQL(
+                    "COPY {} ({}) FROM STDIN (FORMAT CSV, NULL '\\N')"
+                ).format(
+                    sql.Identifier(table_name),
+                    sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+                )
+                with cur.copy(copy_stmt) as cp:
+                    for start in range(0, len(df), COPY_CHUNK_ROWS):
+                        chunk = df.iloc[start:start + COPY_CHUNK_ROWS]
+                        cp.write(chunk.to_csv(index=False, header=False, na_rep="\\N"))
 
-            logger.info("[DB-LOAD] Inserted %d rows into '%s'", len(rows), table_name)
+                logger.info("[DB-LOAD] Copied %d rows into '%s'", len(df), table_name)
+            else:
+                # Fallback for connections without COPY support: one
+                # INSERT ... VALUES (...), (...) per batch instead of one
+                # statement per row
+                batch_rows = max(1, min(INSERT_BATCH_ROWS, PG_MAX_PARAMS // len(columns)))
+                row_sql = sql.SQL("({})").format(
+                    sql.SQL(", ").join(sql.Placeholder() for _ in columns)
+                )
+                insert_head = sql.SQL("INSERT INTO {} ({}) VALUES ").format(
+                    sql.Identifier(table_name),
+                    sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+                )
+                stmts = {}  # rows in batch -> statement (all but the last batch share one)
+
+                rows = _rows_from_df(df)
+                inserted = 0
+                # Pipeline mode sends the batches without waiting on each round-trip
+                with conn.pipeline() if hasattr(conn, "pipeline") else nullcontext():
+                    while batch := list(islice(rows, batch_rows)):
+                        stmt = stmts.get(len(batch))
+                        if stmt is None:
+                            stmt = stmts[len(batch)] = insert_head + sql.SQL(", ").join(
+                                [row_sql] * len(batch)
+                            )
+                        cur.execute(stmt, [v for row in batch for v in row])
+                        inserted += len(batch)
+
+                logger.info("[DB-LOAD] Inserted %d rows into '%s'", inserted, table_name)
 
         conn.commit()
         logger.info("[DB-LOAD] Commit successful for table '%s'", table_name)
@@ -318,10 +517,11 @@ def list_user_tables(schema: str = "public") -> list[dict]:
     return tables
 
 
+@lru_cache(maxsize=256)
 def _validate_table_name(table_name: str) -> str:
     """
-    Same basic validation as load_dataframe_to_table.
     Ensure only letters, digits, and underscores.
+    Cached: the same handful of table names is checked on every request.
     """
     if not str(table_name).replace("_", "").isalnum():
         raise ValueError(f"Invalid table name: {table_name}")
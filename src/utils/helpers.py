@@ -0,0 +1,149 @@
+# src/utils/helpers.py
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def first_k_distinct(series: pd.Series, k: int = 3, start: int = 256) -> List:
+    """
+    First k distinct non-null values of series, in order of appearance
+    (same as series.dropna().unique()[:k]). The column is scanned in
+    blocks that double in size, so it stops as soon as k values are found
+    instead of hashing every row.
+    """
+    found: List = []
+    seen = set()
+    pos, size, n = 0, start, len(series)
+    while pos < n and len(found) < k:
+        for value in series.iloc[pos:pos + size].dropna().unique():
+            if value not in seen:
+                seen.add(value)
+                found.append(value)
+                if len(found) == k:
+                    break
+        pos += size
+        size *= 2
+    return found
+
+
+def count_nulls(df: pd.DataFrame) -> List[int]:
+    """
+    Per-column null counts, same as df.isna().sum().tolist() without
+    building a boolean frame: plain int/uint/bool columns cannot hold nulls
+    and are skipped, float columns are counted with isnan + count_nonzero
+    straight on their numpy buffer, and only the rest go through isna().
+    """
+    counts = []
+    for i, dtype in enumerate(df.dtypes):
+        if isinstance(dtype, np.dtype) and dtype.kind in "iub":
+            counts.append(0)
+        elif isinstance(dtype, np.dtype) and dtype.kind == "f":
+            counts.append(int(np.count_nonzero(np.isnan(df.iloc[:, i].to_numpy()))))
+        else:
+            counts.append(int(np.count_nonzero(df.iloc[:, i].isna().to_numpy())))
+    return counts
+
+
+def frame_nbytes(df: pd.DataFrame, sample: int = 1000) -> int:
+    """
+    Estimate of df.memory_usage(index=True, deep=True).sum(). Frames of up
+    to `sample` rows are measured exactly; for larger ones the deep cost of
+    object columns (Python strings etc.) is measured on `sample` evenly
+    spaced rows and scaled up, so the whole column is never scanned.
+    """
+    n = len(df)
+    if n <= sample:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    shallow = df.memory_usage(index=True, deep=False)
+    rows = df.iloc[:: n // sample]
+    extra = (
+        rows.memory_usage(index=True, deep=True) - rows.memory_usage(index=True, deep=False)
+    ).sum()
+    return int(shallow.sum() + extra * n / len(rows))
+
+
+class DFCache(MutableMapping):
+    """
+    Dict-like source_id -> DataFrame store bounded by total memory.
+
+    Entries are kept in LRU order (a read moves the entry to the end); when
+    the summed frame_nbytes of all entries exceeds max_bytes, the least
+    recently used clean frames are evicted and are re-read from disk by the
+    routes on their next use. Frames with unsaved edits (mark_dirty, until
+    mark_clean or a new assignment) are never evicted, so the store may go
+    over budget while they are held. The most recently stored frame is
+    never evicted either, even if it alone is over budget.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Any, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._dirty: set = set()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def mark_dirty(self, key) -> None:
+        """Pin key's frame in memory: it differs from the copy on disk."""
+        with self._lock:
+            if key in self._frames:
+                self._dirty.add(key)
+
+    def mark_clean(self, key) -> None:
+        """key's frame matches disk again, so it may be evicted."""
+        with self._lock:
+            self._dirty.discard(key)
+            self._evict()
+
+    def is_dirty(self, key) -> bool:
+        return key in self._dirty
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Clean entries in LRU order, sparing the newest
+        if self._total_bytes <= self.max_bytes:
+            return
+        newest = next(reversed(self._frames), None)
+        for key in [k for k in self._frames if k not in self._dirty and k != newest]:
+            _, size = self._frames.pop(key)
+            self._total_bytes -= size
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def __getitem__(self, key) -> pd.DataFrame:
+        with self._lock:
+            df, _ = self._frames[key]
+            self._frames.move_to_end(key)
+            return df
+
+    def __setitem__(self, key, df: pd.DataFrame) -> None:
+        size = frame_nbytes(df)
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._dirty.discard(key)
+            self._frames[key] = (df, size)
+            self._total_bytes += size
+            self._evict()
+
+    def __delitem__(self, key) -> None:
+        with self._lock:
+            _, size = self._frames.pop(key)
+            self._dirty.discard(key)
+            self._total_bytes -= size
+
+    def __contains__(self, key) -> bool:
+        return key in self._frames
+
+    def __iter__(self) -> Iterator:
+        return iter(list(self._frames))
+
+    def __len__(self) -> int:
+        return len(self._frames)
@@ -1,32 +1,30 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from .config import config
-import os
 
+_logging_configured = False
+_log_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
 
-# logging.basicConfig(
-#     level = config["logging"]["level"],
-#     format = config["logging"]["format"],
-#     handlers=[
-#         logging.FileHandler(LOG_FILE),
-#         logging.StreamHandler() if config["logging"].get("console",True) else None
-#     ]
-# )
-
-# def get_logger(name: str):
-#     """
-#     Return a logger with a consistent configuration.
-#     """
-#     return logging.getLogger(name)
-
-# src/utils/logger.py
 
 def setup_logging() -> None:
     """
     Configure root logger using settings from config.yaml.
-    Should be called once at app startup.
+    Should be called once at app startup; repeated calls are no-ops so
+    handlers are never attached twice.
+
+    The root logger only gets a QueueHandler; a background QueueListener
+    owns the file/console handlers, so log I/O never blocks the caller.
+    shutdown_logging is registered with atexit, so records still queued
+    when any entrypoint (web app, ETL scripts) exits are flushed.
     """
+    global _logging_configured, _log_listener, _queue_handler
+    if _logging_configured:
+        return
+
     log_cfg = config.get("logging", {})
     
     level_name = log_cfg.get("level", "INFO").upper()
@@ -57,11 +55,42 @@ def setup_logging() -> None:
         console_handler.setFormatter(logging.Formatter(log_format))
         handlers.append(console_handler)
 
+    log_queue: queue.Queue = queue.Queue(-1)
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(shutdown_logging)
+
+    # Records are formatted by the listener's handlers; keep the queued
+    # message bare so it is not formatted twice
+    _queue_handler = QueueHandler(log_queue)
+    _queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
     logging.basicConfig(
         level=level,
-        handlers=handlers,
+        handlers=[_queue_handler],
         force=True,
     )
+    _logging_configured = True
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the background listener, then attach its
+    file/console handlers to the root logger directly, so records logged
+    during teardown are still written. Called at app shutdown and at
+    interpreter exit; safe to call twice.
+    """
+    global _logging_configured, _log_listener, _queue_handler
+    if _log_listener is not None:
+        _log_listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        for handler in _log_listener.handlers:
+            root.addHandler(handler)
+        _log_listener = None
+        _queue_handler = None
+    atexit.unregister(shutdown_logging)
+    _logging_configured = False
 
 
 def get_logger(name: str) -> logging.Logger:
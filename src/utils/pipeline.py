@@ -1,15 +1,76 @@
 # src/utils/pipeline.py
-from typing import Dict, List, Any, Optional
+import sys
+import threading
+from collections import OrderedDict
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
 
+from src.utils.config import config
+from src.utils.helpers import frame_nbytes
+
+class Op(str, Enum):
+    """
+    Pipeline step ops. Members are str subclasses equal to (and hashing
+    like) the plain op names, so recorded steps still compare and serialize
+    as "drop_columns" etc., while the replay path dispatches by identity.
+    """
+    DROP_ROWS_WITH_NULLS = "drop_rows_with_nulls"
+    DROP_COLUMNS = "drop_columns"
+
+    # str() and templates render the op name, not "Op.DROP_COLUMNS"
+    __str__ = str.__str__
+
+
+# Replay results and raw CSV parses kept by apply_pipeline_to_csv, as
+# key -> (value, estimated bytes). Least recently used entries are evicted
+# past REPLAY_CACHE_SIZE entries or REPLAY_CACHE_MAX_BYTES in total
+# (web.replay_cache_max_mb); this memory is separate from the df_store budget
+REPLAY_CACHE_SIZE = 16
+REPLAY_CACHE_MAX_BYTES = int(config.get("web", {}).get("replay_cache_max_mb", 128)) << 20
+_replay_cache: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+_replay_bytes = 0
+_replay_lock = threading.Lock()
+
+# Memoized build_pipeline_config results (least recently used evicted)
+CONFIG_CACHE_SIZE = 256
+_config_cache: "OrderedDict[tuple, tuple[Sequence[dict], dict]]" = OrderedDict()
+_config_lock = threading.Lock()
+
+# Canonical column tuples shared by every step that names the same columns
+# (least recently used evicted)
+COL_TUPLE_CACHE_SIZE = 1024
+
 
 def _get_pipeline(store: Dict[int, List[dict]], source_id: int) -> List[dict]:
     """
-    Get the list of steps for a given source_id, creating it if missing.
+    Get the list of steps for a given source_id, creating it if missing
+    (without allocating a throwaway list when it already exists).
+    """
+    pipeline = store.get(source_id)
+    if pipeline is None:
+        pipeline = store[source_id] = []
+    return pipeline
+
+
+def _canonical_columns(columns: List[str]) -> tuple:
+    """
+    Column names as a de-duplicated (first occurrence order), interned,
+    shared tuple: steps across sources that name the same columns reference
+    one tuple of interned strings, and replay never re-dedupes them.
     """
-    if source_id not in store:
-        store[source_id] = []
-    return store[source_id]
+    return _shared_columns(
+        tuple(sys.intern(c) if type(c) is str else c for c in dict.fromkeys(columns))
+    )
+
+
+@lru_cache(maxsize=COL_TUPLE_CACHE_SIZE)
+def _shared_columns(columns: tuple) -> tuple:
+    # Returns the first equal tuple seen, while it stays cached
+    return columns
 
 
 def add_step_drop_rows_with_nulls(
@@ -21,9 +82,9 @@ def add_step_drop_rows_with_nulls(
     Record a 'drop_rows_with_nulls' step for this source.
     """
     pipeline = _get_pipeline(store, source_id)
-    step: dict[str, Any] = {"op": "drop_rows_with_nulls"}
+    step: dict[str, Any] = {"op": Op.DROP_ROWS_WITH_NULLS}
     if subset:
-        step["subset"] = subset
+        step["subset"] = _canonical_columns(subset)
     pipeline.append(step)
 
 
@@ -40,8 +101,8 @@ def add_step_drop_columns(
 
     pipeline = _get_pipeline(store, source_id)
     step: dict[str, Any] = {
-        "op": "drop_columns",
-        "columns": columns,
+        "op": Op.DROP_COLUMNS,
+        "columns": _canonical_columns(columns),
     }
     pipeline.append(step)
 
@@ -49,22 +110,49 @@ def add_step_drop_columns(
 def get_steps_for_source(
     store: Dict[int, List[dict]],
     source_id: int,
-) -> List[dict]:
+) -> Tuple[dict, ...]:
     """
-    Return the list of steps for a source (empty list if none).
+    Return a read-only snapshot (tuple) of the steps for a source
+    (empty tuple if none). Record new steps with the add_step_* helpers.
     """
-    return store.get(source_id, [])
+    return tuple(store.get(source_id, ()))
 
 
 def build_pipeline_config(
     source_id: int,
     source_name: Optional[str],
-    steps: List[dict],
+    steps: Sequence[dict],
 ) -> dict:
     """
     Build a simple pipeline config dict that can be serialized to JSON/YAML.
     Currently single-source; later we can extend to multi-source pipelines.
+
+    Results are memoized on (source_id, source_name, identity of each step),
+    so the snapshot tuples from get_steps_for_source hit the cache until a
+    step is added or replaced. The returned dict is shared between callers:
+    treat it as read-only.
     """
+    key = (source_id, source_name, tuple(map(id, steps)))
+    with _config_lock:
+        hit = _config_cache.get(key)
+        if hit is not None:
+            _config_cache.move_to_end(key)
+            return hit[1]
+
+    cfg = _build_pipeline_config(source_id, source_name, steps)
+    with _config_lock:
+        # keep a reference to the steps so their ids cannot be reused while cached
+        _config_cache[key] = (steps, cfg)
+        while len(_config_cache) > CONFIG_CACHE_SIZE:
+            _config_cache.popitem(last=False)
+    return cfg
+
+
+def _build_pipeline_config(
+    source_id: int,
+    source_name: Optional[str],
+    steps: Sequence[dict],
+) -> dict:
     pipeline_name = source_name or f"source_{source_id}_pipeline"
 
     return {
@@ -81,27 +169,248 @@ def build_pipeline_config(
         },
     }
 
-def apply_pipeline_to_df(df: pd.DataFrame, steps: List[dict]) -> pd.DataFrame:
+# A step frozen to (op, args): args is a tuple of column names, or None
+# for a null-drop over all columns (and for ops with no args)
+FrozenSteps = Tuple[Tuple[Any, Optional[Tuple[str, ...]]], ...]
+
+
+def _freeze_drop_columns(step: dict):
+    return tuple(step.get("columns", []))
+
+
+def _freeze_drop_rows_with_nulls(step: dict):
+    subset = step.get("subset")
+    return tuple(subset) if subset else None
+
+
+# op -> args extractor; Op members hash like their names, so steps loaded
+# from JSON (plain strings) resolve through the same table
+_FREEZERS: Dict[Op, Callable[[dict], Optional[Tuple[str, ...]]]] = {
+    Op.DROP_COLUMNS: _freeze_drop_columns,
+    Op.DROP_ROWS_WITH_NULLS: _freeze_drop_rows_with_nulls,
+}
+
+
+def _freeze_steps(steps: List[dict]) -> FrozenSteps:
     """
-    Apply a list of pipeline steps to a DataFrame and return the transformed DataFrame.
-    This is what we'll use for 'replay pipeline from raw'.
+    Hashable, canonical form of a step list (used as the compile cache key).
+    Known ops are normalized to Op members; unknown ops are kept as-is.
     """
-    result = df.copy()
-    
+    frozen = []
     for step in steps:
         op = step.get("op")
+        freeze = _FREEZERS.get(op)
+        if freeze is None:
+            frozen.append((op, None))
+        else:
+            frozen.append((Op(op), freeze(step)))
+    return tuple(frozen)
+
+
+def _fuse_drop_steps(columns: List[str], steps: FrozenSteps) -> tuple[List[str], Optional[List[str]]]:
+    """
+    Collapse a run of drop_columns / drop_rows_with_nulls steps into
+    (columns to drop, columns to null-check), both in terms of the input
+    frame. Each null-drop only checks the columns still present at that
+    point in the pipeline, so the fused result matches step-by-step replay.
+    null_subset is None when no step drops rows.
+    """
+    present = dict.fromkeys(columns)
+    drop_cols: dict = {}
+    null_subset: Optional[dict] = None
 
-        if op == "drop_columns":
-            cols = step.get("columns", [])
-            result = result[[c for c in result.columns if c not in cols]]
+    for op, args in steps:
+        if op is Op.DROP_COLUMNS:
+            for c in args:
+                if c in present:
+                    del present[c]
+                    drop_cols[c] = None
 
-        elif op == "drop_rows_with_nulls":
-            subset = step.get("subset")
-            if subset:
-                result = result.dropna(how="any", subset=subset)
+        elif op is Op.DROP_ROWS_WITH_NULLS:
+            if args:
+                missing = [c for c in args if c not in present]
+                if missing:
+                    raise KeyError(missing)
+                checked = args
             else:
-                result = result.dropna(how="any")
+                checked = present
+            if null_subset is None:
+                null_subset = {}
+            null_subset.update(dict.fromkeys(checked))
 
         # future: fill_nulls, rename_columns, filter_rows, etc.
+        # (non-drop ops will need to end a fused run)
+
+    return list(drop_cols), (list(null_subset) if null_subset is not None else None)
+
+
+def _null_keep_mask(df: pd.DataFrame, subset: List[str]) -> Optional[np.ndarray]:
+    """
+    Row mask for df.dropna(how="any", subset=subset), or None when it would
+    keep every row.
+    Fast path when every subset column has a plain numpy numeric dtype:
+    int/uint/bool columns cannot hold nulls and are skipped, float columns
+    go through one isnan. Otherwise the mask is one notna() over the subset.
+    """
+    dtypes = [df[c].dtype for c in subset] if df.columns.is_unique else None
+    if not dtypes or not all(isinstance(t, np.dtype) and t.kind in "fiub" for t in dtypes):
+        keep = df[subset].notna().to_numpy().all(axis=1)
+    else:
+        float_cols = [c for c, t in zip(subset, dtypes) if t.kind == "f"]
+        if not float_cols:
+            return None
+        keep = ~np.isnan(df[float_cols].to_numpy()).any(axis=1)
+    return None if keep.all() else keep
+
+
+def _drop_null_rows(df: pd.DataFrame, subset: List[str]) -> pd.DataFrame:
+    """
+    df.dropna(how="any", subset=subset) as a single boolean take, skipped
+    (no row copied) when the mask keeps every row.
+    """
+    keep = _null_keep_mask(df, subset)
+    return df if keep is None else df[keep]
+
+
+def drop_null_rows(df: pd.DataFrame, subset: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    df.dropna(how="any", subset=subset), but returns df itself (no copy)
+    when no row has a null.
+    """
+    return _drop_null_rows(df, list(df.columns) if subset is None else list(subset))
+
+
+@lru_cache(maxsize=64)
+def _compile_frozen(steps: FrozenSteps) -> Callable[..., pd.DataFrame]:
+    # Fused plans depend only on the input's column labels, so they are
+    # memoized per column layout (bounded: a pipeline sees few layouts).
+    plans: Dict[tuple, tuple[List[str], Optional[List[str]]]] = {}
+
+    def run(df: pd.DataFrame, copy: bool = False) -> pd.DataFrame:
+        layout = tuple(df.columns)
+        plan = plans.get(layout)
+        if plan is None:
+            drop_cols, null_subset = _fuse_drop_steps(list(layout), steps)
+            # a null check over no columns keeps every row
+            plan = (drop_cols, null_subset or None)
+            if len(plans) >= 8:
+                plans.clear()
+            plans[layout] = plan
+        drop_cols, null_subset = plan
+
+        if null_subset is None and not drop_cols:
+            return df.copy() if copy else df
+
+        # The row mask is computed on the full frame (the null check may
+        # cover columns that are dropped), but rows are taken after the
+        # column drop so dropped columns are never copied row by row
+        keep = _null_keep_mask(df, null_subset) if null_subset is not None else None
+        result = df.drop(columns=drop_cols) if drop_cols else df
+        if keep is not None:
+            result = result[keep]
+        if copy and result is df:
+            return df.copy()
+        return result
+
+    return run
+
+
+def compile_pipeline(steps: List[dict]) -> Callable[..., pd.DataFrame]:
+    """
+    Specialize a step list once into a function run(df, copy=False).
+    Compiled functions are cached on the canonical form of the steps, so
+    replaying the same pipeline skips step parsing and fusion planning.
+    """
+    return _compile_frozen(_freeze_steps(steps))
+
+
+def apply_pipeline_to_df(df: pd.DataFrame, steps: List[dict], copy: bool = False) -> pd.DataFrame:
+    """
+    Apply a list of pipeline steps to a DataFrame and return the transformed DataFrame.
+    This is what we'll use for 'replay pipeline from raw'.
+
+    Drop steps are fused: all null-row drops become one dropna and all
+    column drops one drop, so the frame is materialized at most twice.
+    The input is never modified. When no step changes anything, df itself
+    is returned unless copy=True.
+    """
+    if not steps:
+        return df.copy() if copy else df
+    return compile_pipeline(steps)(df, copy=copy)
+
+
+def _cache_replay_result(key, result: pd.DataFrame, nbytes: Optional[int] = None) -> None:
+    """
+    Store result under key, evicting least recently used entries until the
+    cache is back within REPLAY_CACHE_SIZE and REPLAY_CACHE_MAX_BYTES.
+    A result bigger than the whole byte budget is not cached.
+    """
+    global _replay_bytes
+    if nbytes is None:
+        nbytes = frame_nbytes(result)
+    if nbytes > REPLAY_CACHE_MAX_BYTES:
+        return
+    with _replay_lock:
+        old = _replay_cache.pop(key, None)
+        if old is not None:
+            _replay_bytes -= old[1]
+        _replay_cache[key] = (result, nbytes)
+        _replay_bytes += nbytes
+        while len(_replay_cache) > REPLAY_CACHE_SIZE or _replay_bytes > REPLAY_CACHE_MAX_BYTES:
+            _, (_, evicted) = _replay_cache.popitem(last=False)
+            _replay_bytes -= evicted
+
+
+def apply_pipeline_to_csv(
+    path: Path,
+    steps: Sequence[dict],
+    reader: Callable[..., pd.DataFrame] = pd.read_csv,
+) -> pd.DataFrame:
+    """
+    Replay steps on a CSV file without materializing columns that the
+    pipeline throws away: the fused plan is computed from the header, and
+    only columns that survive or are null-checked are read (projection
+    pushdown). reader is called as reader(path) or reader(path, usecols=...).
+
+    Results are memoized on (path, inode, mtime_ns, size, steps), so
+    replaying an unchanged file skips the read entirely; the inode catches
+    files replaced (temp file + rename) within one mtime tick at the same
+    size. The last parsed frame per file is cached as well, so a changed
+    step list reuses it when it already holds the needed columns. Returned
+    frames may be shared with the cache: treat them as read-only.
+    """
+    path = Path(path)
+    st = path.stat()
+    frozen = _freeze_steps(list(steps))
+    key = ("csv", str(path), st.st_ino, st.st_mtime_ns, st.st_size, frozen)
+    with _replay_lock:
+        hit = _replay_cache.get(key)
+        if hit is not None:
+            _replay_cache.move_to_end(key)
+            return hit[0]
+
+    # The last parse of this file is kept too, so editing the step list
+    # only re-reads the CSV when it needs columns that parse left out
+    raw_key = ("raw", str(path), st.st_ino, st.st_mtime_ns, st.st_size, reader)
+    with _replay_lock:
+        raw = _replay_cache.get(raw_key)
+        raw = raw[0] if raw is not None else None
+    header = raw[0] if raw is not None else list(pd.read_csv(path, nrows=0).columns)
+
+    drop_cols, null_subset = _fuse_drop_steps(header, frozen)
+    pruned = set(drop_cols).difference(null_subset or ())
+    usecols = [c for c in header if c not in pruned]
+
+    # Duplicate headers are renamed by the parser, and usecols=[] would lose
+    # the row count, so only prune in the plain case
+    if not (len(usecols) < len(header) and usecols and len(set(header)) == len(header)):
+        usecols = header
+    if raw is not None and set(usecols) <= set(raw[1].columns):
+        df = raw[1] if len(usecols) == raw[1].shape[1] else raw[1][usecols]
+    else:
+        df = reader(path, usecols=usecols) if usecols is not header else reader(path)
+        _cache_replay_result(raw_key, (header, df), frame_nbytes(df))
 
+    result = _compile_frozen(frozen)(df)
+    _cache_replay_result(key, result)
     return result
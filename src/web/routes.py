@@ -1,14 +1,36 @@
 # src/web/routes.py
+import asyncio
+import datetime
+import hashlib
+import html
 import json
+import os
+import shutil
+import weakref
+from collections import OrderedDict
+from decimal import Decimal
 from fastapi import APIRouter, Request, UploadFile, File, HTTPException, Form, Query
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response
+from markupsafe import Markup
 
 
 
+import numpy as np
 import pandas as pd
-from io import BytesIO
 from pathlib import Path
 from typing import List
+from uuid import uuid4
+
+try:  # optional: multithreaded CSV parsing, Feather sidecars
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+CSV_ENGINE = "pyarrow" if HAS_PYARROW else "c"
+try:  # optional: serializes numpy arrays without boxing each value
+    import orjson
+except ImportError:
+    orjson = None
 from ..etl.retail.run import RetailETLResult, run_retail_etl
 
 from ..utils.pipeline import (
@@ -16,15 +38,18 @@ from ..utils.pipeline import (
     add_step_drop_columns,
     get_steps_for_source,
     build_pipeline_config,
-    apply_pipeline_to_df,
+    apply_pipeline_to_csv,
+    drop_null_rows,
 )
 
+from ..utils.config import config
 from ..utils.logger import get_logger
+from ..utils.helpers import count_nulls, first_k_distinct
 from ..utils.db import (
     get_all_data_sources,
     insert_data_source,
     update_data_source_shape,
-    delete_data_sources,
+    delete_data_sources_and_list,
     update_source_filepath,
     get_data_source_by_id,
     load_dataframe_to_table,
@@ -40,9 +65,211 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_SOURCES_DIR = BASE_DIR / "data" / "sources"
 DATA_SOURCES_DIR.mkdir(parents=True, exist_ok=True)
 
+# Bytes read per chunk when streaming an upload to disk
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+# Bytes per send() when streaming a CSV download
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+
+# Keep a Feather copy of each source next to its CSV (needs pyarrow)
+USE_SIDECAR_CACHE = HAS_PYARROW
+
+# Rows scanned for sample values in the validation report
+VALIDATION_SAMPLE_ROWS = 200
+
+# Rendered preview tables: (source_id, id(df), shape) -> (weakref to df, html).
+# Clean/drop steps always store a new DataFrame, so a changed frame misses;
+# the weakref guards against a recycled id.
+PREVIEW_CACHE_SIZE = 64
+_PREVIEW_CACHE: "OrderedDict[tuple, tuple[weakref.ref, str]]" = OrderedDict()
+
+# Rendered halves of partials/source_preview.html per source_id, split at
+# _PREVIEW_MARKER (see _source_preview_response)
+_PREVIEW_MARKER = "\x00preview_html\x00"
+_SOURCE_PREVIEW_SKELETONS: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Serialized table_visualize payloads (least recently used evicted), keyed
+# on a hash of the plotted columns, so writes by other workers or outside
+# the app are picked up too.
+VISUALIZE_CACHE_SIZE = 128
+_VISUALIZE_CACHE: "OrderedDict[tuple, tuple[str, str]]" = OrderedDict()
+
+
+def _read_csv_fast(source, skip_rows: int = 0, **kwargs) -> pd.DataFrame:
+    """
+    Read a CSV (path or buffer) with the pyarrow engine when pyarrow is
+    installed, falling back to pandas' C parser if it is missing or rejects
+    the file. Columns stay numpy-backed and get the same dtypes either way,
+    except that pyarrow parses ISO date/timestamp columns the C parser
+    leaves as strings. Extra kwargs (e.g. usecols) are passed to pd.read_csv.
+    """
+    if skip_rows and skip_rows > 0:
+        kwargs["skiprows"] = skip_rows
+    if CSV_ENGINE == "pyarrow":
+        try:
+            return pd.read_csv(source, engine="pyarrow", **kwargs)
+        except (ValueError, NotImplementedError):
+            # ArrowInvalid and pandas' unsupported-option errors are ValueErrors
+            logger.warning("pyarrow CSV parse failed; retrying with the C parser", exc_info=True)
+            if hasattr(source, "seek"):
+                source.seek(0)
+    return pd.read_csv(source, **kwargs)
+
+
+def _write_csv_fast(df: pd.DataFrame, path: Path) -> None:
+    """
+    df.to_csv(path, index=False), written to a temp file and renamed over
+    path, so readers never see a partial file and every save gets a new
+    inode (apply_pipeline_to_csv keys its cache on it).
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{uuid4().hex}.part")
+    try:
+        df.to_csv(tmp, index=False)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f" and np.isnan(obj).any():
+            obj = np.where(np.isnan(obj), None, obj)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps_json(obj) -> str:
+    """json.dumps that accepts numpy arrays, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    return json.dumps(obj, default=_json_default)
+
+
+def _script_json(obj) -> Markup:
+    """
+    _dumps_json output that is safe to inline in a <script> block: the same
+    escaping as Jinja's |tojson filter, so a value containing "</script>"
+    cannot end the tag, but encoded by orjson when available.
+    """
+    return Markup(
+        _dumps_json(obj)
+        .replace("<", "\\u003c")
+        .replace(">", "\\u003e")
+        .replace("&", "\\u0026")
+        .replace("'", "\\u0027")
+    )
+
+
+def _column_arrays(df: pd.DataFrame) -> list[np.ndarray]:
+    """
+    One array per column for _dumps_json. Plain numeric columns are passed
+    through as-is; anything else becomes an object array with None for
+    missing values.
+    """
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+            arrays.append(series.to_numpy())
+        else:
+            arrays.append(series.astype(object).where(series.notna(), None).to_numpy())
+    return arrays
+
+
+def _spool_upload(src, dest: Path) -> int:
+    """Copy an upload's spooled file to dest in UPLOAD_CHUNK_BYTES blocks."""
+    with open(dest, "wb") as f_out:
+        shutil.copyfileobj(src, f_out, UPLOAD_CHUNK_BYTES)
+        return f_out.tell()
+
+
+class _CSVFileResponse(FileResponse):
+    """FileResponse that streams in larger blocks (fewer send() round trips)."""
+
+    chunk_size = DOWNLOAD_CHUNK_BYTES
+
+
+def _stat_or_none(path: Path) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _sidecar_path(source_id) -> Path:
+    return DATA_SOURCES_DIR / f"source_{source_id}.feather"
+
+
+def _write_sidecar(df: pd.DataFrame, source_id) -> None:
+    """
+    Save a Feather copy of the source next to its CSV so reloads skip CSV
+    parsing and type inference. Written to a temp file and renamed, so a
+    concurrent reload never sees a partial file. Failures (e.g. mixed-type
+    object columns Arrow cannot convert) only cost the fast path.
+    """
+    if not USE_SIDECAR_CACHE:
+        return
+    sidecar = _sidecar_path(source_id)
+    tmp = sidecar.with_name(f"{sidecar.name}.{uuid4().hex}.part")
+    try:
+        df.to_feather(tmp)
+        tmp.replace(sidecar)
+    except Exception:
+        logger.exception("Failed to write sidecar for source_id=%s", source_id)
+        tmp.unlink(missing_ok=True)
+
+
+def _read_source_file(source_id) -> pd.DataFrame | None:
+    """
+    Load a source from disk: the sidecar if it is at least as new as the
+    CSV (it is written right after it), otherwise the CSV. None if the CSV
+    is missing. A CSV read also writes the sidecar (USE_SIDECAR_CACHE), so
+    sources that predate it only pay for parsing once.
+    """
+    csv_path = DATA_SOURCES_DIR / f"source_{source_id}.csv"
+    csv_stat = _stat_or_none(csv_path)
+    if csv_stat is None:
+        return None
+
+    mtime_ns = csv_stat.st_mtime_ns
+    if USE_SIDECAR_CACHE:
+        sidecar = _sidecar_path(source_id)
+        sidecar_stat = _stat_or_none(sidecar)
+        if sidecar_stat is not None and sidecar_stat.st_mtime_ns >= mtime_ns:
+            try:
+                return pd.read_feather(sidecar)
+            except Exception:
+                logger.warning("Unreadable sidecar for source_id=%s; using CSV", source_id, exc_info=True)
+
+    df = _read_csv_fast(csv_path)
+    # Skip the sidecar if the CSV was rewritten while it was being parsed
+    if USE_SIDECAR_CACHE and csv_path.stat().st_mtime_ns == mtime_ns:
+        _write_sidecar(df, source_id)
+    return df
+
 
 def get_templates(request: Request):
     return request.app.state.templates
+
+
+def _render_html(templates, name: str, context: dict) -> HTMLResponse:
+    """
+    Render a template straight into an HTMLResponse. Same output as
+    templates.TemplateResponse (the compiled template comes from the Jinja
+    environment's cache) without its per-call response setup.
+    """
+    return HTMLResponse(templates.get_template(name).render(context))
+
+
 def get_df_store(request: Request):
     return request.app.state.df_store  # type: ignore[attr-defined]    
 
@@ -52,23 +279,96 @@ async def index(request: Request):
     templates = get_templates(request)
     return templates.TemplateResponse("index.html", {"request": request})
 
+def _preview_cell(value) -> str:
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return "NaN"
+    return html.escape(str(value))
+
+
+def _preview_column(series: pd.Series) -> List[str]:
+    """
+    Escaped cell strings for one preview column. Float columns are
+    formatted in one call at 6 significant digits (display only) instead
+    of each value's full 17-digit repr.
+    """
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind == "f":
+        values = series.to_numpy()
+        cells = np.char.mod("%.6g", values).astype(object)
+        cells[np.isnan(values)] = "NaN"
+        return cells.tolist()
+    return [_preview_cell(v) for v in series]
+
+
+def _render_preview_table(preview_df: pd.DataFrame) -> str:
+    """
+    Plain HTML table for a few preview rows, built directly instead of via
+    DataFrame.to_html's generic formatter. Same table markup/classes as
+    to_html(classes="preview-table", index=False); NA cells show as NaN.
+    Cells are formatted column by column, see _preview_column.
+    """
+    header = "".join(f"<th>{html.escape(str(c))}</th>" for c in preview_df.columns)
+    columns = [_preview_column(preview_df.iloc[:, i]) for i in range(preview_df.shape[1])]
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>"
+        for row in zip(*columns)
+    )
+    return (
+        '<table border="1" class="dataframe preview-table">'
+        f'<thead><tr style="text-align: right;">{header}</tr></thead>'
+        f"<tbody>{body}</tbody></table>"
+    )
+
+
+def _preview_table_html(df: pd.DataFrame, source_id) -> str:
+    """
+    HTML for the first 10 rows of df, memoized per DataFrame object.
+    """
+    key = (source_id, id(df), df.shape)
+    hit = _PREVIEW_CACHE.get(key)
+    if hit is not None and hit[0]() is df:
+        _PREVIEW_CACHE.move_to_end(key)
+        return hit[1]
+
+    table_html = _render_preview_table(df.head(10))
+    _PREVIEW_CACHE[key] = (weakref.ref(df), table_html)
+    while len(_PREVIEW_CACHE) > PREVIEW_CACHE_SIZE:
+        _PREVIEW_CACHE.popitem(last=False)
+    return table_html
+
+
+def _source_preview_response(request: Request, source_id, preview_html: str) -> HTMLResponse:
+    """
+    partials/source_preview.html rendered around preview_html. Everything
+    else in the partial depends only on source_id, so the template is
+    rendered once per source with a marker in place of preview_html and
+    later responses just splice the new table between the two halves.
+    The skeleton is re-rendered when the template file changes.
+    """
+    templates = get_templates(request)
+    key = (id(templates.env), source_id)
+    hit = _SOURCE_PREVIEW_SKELETONS.get(key)
+    if hit is None or not hit[0].is_up_to_date:
+        template = templates.get_template("partials/source_preview.html")
+        rendered = template.render(
+            {"request": request, "source_id": source_id, "preview_html": _PREVIEW_MARKER}
+        )
+        head, tail = rendered.split(_PREVIEW_MARKER, 1)
+        hit = (template, head, tail)
+        _SOURCE_PREVIEW_SKELETONS[key] = hit
+        while len(_SOURCE_PREVIEW_SKELETONS) > PREVIEW_CACHE_SIZE:
+            _SOURCE_PREVIEW_SKELETONS.popitem(last=False)
+    else:
+        _SOURCE_PREVIEW_SKELETONS.move_to_end(key)
+    return HTMLResponse(hit[1] + preview_html + hit[2])
+
+
 def get_preview(request : Request, df, source_id, preview_message = ""):
         #Build preview
-    templates = get_templates(request)
-    preview_df = df.head(10)
-    table_html = preview_df.to_html(classes="preview-table", index=False)
+    table_html = _preview_table_html(df, source_id)
 
     logger.debug("Generated preview for %s (10 rows)", source_id)
 
-    return templates.TemplateResponse(
-        "partials/source_preview.html",
-        {
-            "request": request,
-            "filename": f"filename: (Source ID: {source_id})",
-            "preview_html": preview_message + " " +table_html,
-            "source_id": source_id
-        },
-    )
+    return _source_preview_response(request, source_id, preview_message + " " + table_html)
 @router.get("/sources", response_class=HTMLResponse)
 async def sources_page(request: Request):
     """
@@ -106,14 +406,28 @@ async def upload_csv_source(request: Request,
     logger.info("Received CSV upload: filename=%s, content_type=%s",
                 file.filename, file.content_type)
 
-    content = await file.read()
-    logger.debug("CSV file %s size: %d bytes", file.filename, len(content))
+    # Stream the upload to a temp file in chunks and parse from disk, so the
+    # whole file is never held in memory next to the parsed DataFrame
+    tmp_path = DATA_SOURCES_DIR / f"upload_{uuid4().hex}.csv.part"
+    try:
+        size = await asyncio.to_thread(_spool_upload, file.file, tmp_path)
+        logger.debug("CSV file %s size: %d bytes", file.filename, size)
+    except Exception as e:
+        logger.exception("Failed to write upload to disk: %s", file.filename)
+        tmp_path.unlink(missing_ok=True)
+        return templates.TemplateResponse(
+            "partials/source_preview.html",
+            {
+                "request": request,
+                "filename": file.filename,
+                "preview_html": f"<p>Failed to save upload: {e}</p>",
+            },
+        )
 
     try:
-        if skip_rows and skip_rows > 0:
-            df = pd.read_csv(BytesIO(content), skiprows=skip_rows)
-        else:
-            df = pd.read_csv(BytesIO(content))
+        # Parsing is a blocking C call; run it off the event loop so other
+        # requests keep being served while a large upload is parsed
+        df = await asyncio.to_thread(_read_csv_fast, tmp_path, skip_rows=skip_rows)
 
         row_count, col_count = df.shape
         logger.info(
@@ -122,6 +436,7 @@ async def upload_csv_source(request: Request,
         )
     except Exception as e:
         logger.exception("Failed to read CSV file: %s skip_rows: %s", file.filename,skip_rows)
+        tmp_path.unlink(missing_ok=True)
         return templates.TemplateResponse(
             "partials/source_preview.html",
             {
@@ -144,6 +459,7 @@ async def upload_csv_source(request: Request,
         )
     except Exception:
         logger.exception("Failed to insert data source metadata")
+        tmp_path.unlink(missing_ok=True)
         return templates.TemplateResponse(
             "partials/source_preview.html",
             {
@@ -158,9 +474,9 @@ async def upload_csv_source(request: Request,
     target_path = DATA_SOURCES_DIR / source_filename
 
     try:
-        with open(target_path, "wb") as f_out:
-            f_out.write(content)
-            logger.info("Saved CSV file for source_id=%s to %s", source_id, target_path)
+        tmp_path.replace(target_path)
+        logger.info("Saved CSV file for source_id=%s to %s", source_id, target_path)
+        await asyncio.to_thread(_write_sidecar, df, source_id)
     except Exception:
         logger.exception("Failed to save csv file to disk")
     
@@ -184,32 +500,31 @@ async def open_source(request: Request, source_id: int):
     df = df_store.get(source_id)
 
     if df is None:
-        csv_path = DATA_SOURCES_DIR /f"source_id.csv"
-        if not csv_path.exists():
-            logger.error("Open requested for missing source_id=%s", source_id)
+        try:
+            df = await asyncio.to_thread(_read_source_file, source_id)
+        except Exception as e:
+            logger.exception("Failed to read CSV for open, source_id=%s", source_id)
             return templates.TemplateResponse(
                 "partials/source_preview.html",
                 {
                     "request": request,
                     "filename": f"Source {source_id}",
-                    "preview_html": "<p>Source file not found.</p>",
+                    "preview_html": f"<p>Failed to load CSV: {e}</p>",
                     "source_id": source_id,
                 },
             )
-        try:
-            df = pd.read_csv(csv_path)
-            df_store[source_id] = df
-        except Exception as e:
-            logger.exception("Failed to read CSV for open, source_id=%s", source_id)
+        if df is None:
+            logger.error("Open requested for missing source_id=%s", source_id)
             return templates.TemplateResponse(
                 "partials/source_preview.html",
                 {
                     "request": request,
                     "filename": f"Source {source_id}",
-                    "preview_html": f"<p>Failed to load CSV: {e}</p>",
+                    "preview_html": "<p>Source file not found.</p>",
                     "source_id": source_id,
                 },
             )
+        df_store[source_id] = df
     else:
         logger.info("Reusing in-memory DataFrame for source_id=%s", source_id)
 
@@ -232,18 +547,26 @@ def get_df(request,source_id):
     df_store = get_df_store(request)
     df = df_store.get(source_id)
     if df is None:
-        csv_path = DATA_SOURCES_DIR / f"source_{source_id}.csv"
-        if not csv_path.exists():
-            logger.error("Error loading csv file from datasource for source_id=%s with source path = %s", source_id, csv_path )
-            return None
         try:
-            df = pd.read_csv(csv_path)
-            df_store[source_id] = df
-            logger.info("Loaded source_id=%s into df_store for validation", source_id)
+            df = _read_source_file(source_id)
         except Exception:
             logger.exception("Failed to read CSV for validation, source_id=%s", source_id)
             return None
+        if df is None:
+            csv_path = DATA_SOURCES_DIR / f"source_{source_id}.csv"
+            logger.error("Error loading csv file from datasource for source_id=%s with source path = %s", source_id, csv_path )
+            return None
+        df_store[source_id] = df
+        logger.info("Loaded source_id=%s into df_store for validation", source_id)
     return df
+
+
+async def _get_df_async(request, source_id):
+    """get_df for async handlers: a disk read runs in a worker thread."""
+    df = get_df_store(request).get(source_id)
+    if df is not None:
+        return df
+    return await asyncio.to_thread(get_df, request, source_id)
         
 @router.post("/sources/{source_id}/validate",response_class=HTMLResponse)
 async def validate_source(request: Request, source_id: int):
@@ -256,7 +579,7 @@ async def validate_source(request: Request, source_id: int):
     """
     logger.info("Started source validation request for source id %s",source_id)
     templates = get_templates(request)
-    df = get_df(request,source_id)
+    df = await _get_df_async(request, source_id)
     if df is None:
         return templates.TemplateResponse(
                 "partials/validation_report.html",
@@ -271,13 +594,18 @@ async def validate_source(request: Request, source_id: int):
     row_count = len(df)
     report = []
 
-    for col_name  in df.columns:
-        series = df[col_name]
-        null_count = int(series.isna().sum())
-        total = len(series)
-        null_pct = round((null_count / total) * 100,2) if total else 0.0
-        dtype = str(series.dtype)
-        non_null_samples = series.dropna().unique()[:3]
+    # Null counts come straight off each column's buffer (count_nulls);
+    # samples come from an early-exit scan that starts with the first
+    # VALIDATION_SAMPLE_ROWS rows and only reads further while fewer than
+    # 3 distinct values are seen.
+    null_counts = count_nulls(df)
+    dtypes = [str(t) for t in df.dtypes]
+
+    for i, col_name in enumerate(df.columns):
+        null_count = int(null_counts[i])
+        null_pct = round((null_count / row_count) * 100,2) if row_count else 0.0
+        dtype = dtypes[i]
+        non_null_samples = first_k_distinct(df.iloc[:, i], 3, start=VALIDATION_SAMPLE_ROWS)
         sample_values = ", ".join(map(str, non_null_samples))
 
         report.append({
@@ -308,7 +636,7 @@ async def clean_source_drop_null_rows(request: Request, source_id: int):
     """
     templates = get_templates(request)
    
-    df = get_df(request,source_id)
+    df = await _get_df_async(request, source_id)
     if df is None:
         return templates.TemplateResponse(
                 "partials/source_preview.html",
@@ -321,11 +649,13 @@ async def clean_source_drop_null_rows(request: Request, source_id: int):
             )
     
     before_rows = len(df)
-    cleaned_df = df.dropna(how="any")
+    cleaned_df = drop_null_rows(df)
     after_rows = len(cleaned_df)
     removed = before_rows - after_rows
     df_store = get_df_store(request)  # type: ignore[attr-defined]
     df_store[source_id] = cleaned_df
+    # unsaved edit: keep it in memory until /save writes it to disk
+    df_store.mark_dirty(source_id)
 
     # Record this step in the pipeline
     pipeline_store = request.app.state.pipeline_store  # type: ignore[attr-defined]
@@ -346,22 +676,27 @@ async def download_source(source_id: int):
     cleaned_path = DATA_SOURCES_DIR / f"source_{source_id}_clean.csv"
     raw_path = DATA_SOURCES_DIR / f"source_{source_id}.csv"
 
-    if cleaned_path.exists():
+    # One stat per candidate, handed to the response so it sets
+    # Content-Length up front instead of stat-ing the file again
+    if (st := _stat_or_none(cleaned_path)) is not None:
         logger.info("Download cleaned CSV for source_id=%s", source_id)
-        return FileResponse(
-            cleaned_path,media_type = "text/csv",
-            filename = f"source_{source_id}_clean.csv"
+        return _CSVFileResponse(
+            cleaned_path,
+            media_type="text/csv",
+            filename=f"source_{source_id}_clean.csv",
+            stat_result=st,
         )
-    elif  raw_path.exists():
+    elif (st := _stat_or_none(raw_path)) is not None:
         logger.info("Download raw CSV (no cleaned version) for source_id=%s", source_id)
-        return FileResponse(
+        return _CSVFileResponse(
             raw_path,
             media_type="text/csv",
             filename=f"source_{source_id}.csv",
+            stat_result=st,
         )
     else:
         logger.error("Download requested for missing source_id=%s", source_id)
-        raise HTTPException(status_code=404, detail="Source not found")        
+        raise HTTPException(status_code=404, detail="Source not found")
 
 @router.post("/sources/{source_id}/clean/drop-columns",response_class=HTMLResponse)
 async def clean_source_drop_columns(
@@ -369,7 +704,7 @@ async def clean_source_drop_columns(
 ):
     logger.info("Started dropping NA columns for source_id %s",source_id)
     templates = get_templates(request)
-    df = get_df(request,source_id)
+    df = await _get_df_async(request, source_id)
     if df is None:
         return templates.TemplateResponse(
                 "partials/source_preview.html",
@@ -388,11 +723,13 @@ async def clean_source_drop_columns(
         return get_preview(request,df,source_id,preview_message)
 
     before_cols = df.shape[1]
-    remaining_cols = [c for c in df.columns if c not in columns]
-    cleaned_df = df[remaining_cols]
+    drop_cols = df.columns.intersection(columns)
+    cleaned_df = df.drop(columns=drop_cols) if len(drop_cols) else df
     after_cols = cleaned_df.shape[1]
     df_store = get_df_store(request)  # type: ignore[attr-defined]
     df_store[source_id] = cleaned_df
+    # unsaved edit: keep it in memory until /save writes it to disk
+    df_store.mark_dirty(source_id)
 
     # Record this step in the pipeline
     pipeline_store = request.app.state.pipeline_store  # type: ignore[attr-defined]
@@ -430,8 +767,12 @@ async def save_source(request: Request, source_id: int):
     # Save to CSV (overwrite original)
     csv_path = DATA_SOURCES_DIR / f"source_{source_id}.csv"
     try:
-        df.to_csv(csv_path, index=False)
+        await asyncio.to_thread(_write_csv_fast, df, csv_path)
         logger.info("Saved in-memory DataFrame to %s for source_id=%s", csv_path, source_id)
+        await asyncio.to_thread(_write_sidecar, df, source_id)
+        # unless another edit replaced the frame while it was being written
+        if df_store.get(source_id) is df:
+            df_store.mark_clean(source_id)
     except Exception:
         logger.exception("Failed to save CSV for source_id=%s", source_id)
         return templates.TemplateResponse(
@@ -462,8 +803,7 @@ async def save_source(request: Request, source_id: int):
         request=request,
         sources=sources,
     )
-    preview_df = df.head(10)
-    table_html = preview_df.to_html(classes="preview-table", index=False)
+    table_html = _preview_table_html(df, source_id)
 
     message_html = (
         f"<p>Saved current state. Shape is now ({row_count}, {col_count}).</p>"
@@ -481,6 +821,22 @@ async def save_source(request: Request, source_id: int):
     )
 
 
+def _delete_source_files(source_ids) -> None:
+    for sid in source_ids:
+        csv_path = DATA_SOURCES_DIR / f"source_{sid}.csv"
+        try:
+            csv_path.unlink()
+            logger.info("Deleted CSV file %s for source_id=%s", csv_path, sid)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.exception("Failed to delete CSV file for source_id=%s", sid)
+        try:
+            _sidecar_path(sid).unlink(missing_ok=True)
+        except Exception:
+            logger.exception("Failed to delete sidecar for source_id=%s", sid)
+
+
 @router.post("/sources/delete", response_class=HTMLResponse)
 async def delete_sources_route(
     request: Request,
@@ -499,34 +855,25 @@ async def delete_sources_route(
     ids_to_delete = source_ids or []
     logger.info("Requested deletion for source_ids=%s", ids_to_delete)
 
-    # Delete from DB first
-    if ids_to_delete:
+    # Delete the rows and fetch the refreshed list in one round trip
+    try:
+        sources = delete_data_sources_and_list(ids_to_delete)
+    except Exception:
+        logger.exception("Failed to delete sources in DB")
         try:
-            delete_data_sources(ids_to_delete)
+            sources = get_all_data_sources()
         except Exception:
-            logger.exception("Failed to delete sources in DB")
+            logger.exception("Error fetching data sources after delete")
+            sources = []
 
-        # Delete files + in-memory dfs
+    # Delete files + in-memory dfs
+    if ids_to_delete:
+        await asyncio.to_thread(_delete_source_files, ids_to_delete)
         for sid in ids_to_delete:
-            csv_path = DATA_SOURCES_DIR / f"source_{sid}.csv"
-            try:
-                if csv_path.exists():
-                    csv_path.unlink()
-                    logger.info("Deleted CSV file %s for source_id=%s", csv_path, sid)
-            except Exception:
-                logger.exception("Failed to delete CSV file for source_id=%s", sid)
-
             if sid in df_store:
                 df_store.pop(sid, None)
                 logger.info("Removed in-memory DataFrame for source_id=%s", sid)
 
-    # Get refreshed list of sources and return the table partial
-    try:
-        sources = get_all_data_sources()
-    except Exception:
-        logger.exception("Error fetching data sources after delete")
-        sources = []
-
     return templates.TemplateResponse(
         "partials/sources_table.html",
         {
@@ -595,10 +942,14 @@ async def replay_pipeline_from_raw(request: Request, source_id: int):
             },
         )
 
+    # Read the raw CSV (only the columns the pipeline keeps or checks)
+    # and apply pipeline steps
     try:
-        raw_df = pd.read_csv(csv_path)
+        transformed_df = await asyncio.to_thread(
+            apply_pipeline_to_csv, csv_path, steps, reader=_read_csv_fast
+        )
     except Exception as e:
-        logger.exception("Failed to read raw CSV for replay, source_id=%s", source_id)
+        logger.exception("Failed to replay raw CSV, source_id=%s", source_id)
         return templates.TemplateResponse(
             "partials/source_preview.html",
             {
@@ -608,28 +959,18 @@ async def replay_pipeline_from_raw(request: Request, source_id: int):
                 "source_id": source_id,
             },
         )
-
-    # Apply pipeline steps
-    transformed_df = apply_pipeline_to_df(raw_df, steps)
     df_store[source_id] = transformed_df
+    # replayed steps are not on disk until /save
+    df_store.mark_dirty(source_id)
 
-    preview_df = transformed_df.head(10)
-    table_html = preview_df.to_html(classes="preview-table", index=False)
+    table_html = _preview_table_html(transformed_df, source_id)
 
     message_html = (
         "<p>Replayed pipeline from raw CSV. "
         f"Final shape: ({transformed_df.shape[0]}, {transformed_df.shape[1]}).</p>"
     )
 
-    return templates.TemplateResponse(
-        "partials/source_preview.html",
-        {
-            "request": request,
-            "filename": f"Replayed Source (ID: {source_id})",
-            "preview_html": message_html + table_html,
-            "source_id": source_id,
-        },
-    )
+    return _source_preview_response(request, source_id, message_html + table_html)
 
 @router.get("/etls", response_class=HTMLResponse)
 async def etls_page(request: Request):
@@ -659,7 +1000,10 @@ async def etls_run_retail(
 
     try:
         # For now, even if run_type == "schedule", we just run it immediately
-        result = run_retail_etl(batch_size=batch_size)
+        result = run_retail_etl(
+            batch_size=batch_size,
+            sales_chunksize=config.get("etl", {}).get("sales_chunksize"),
+        )
         if run_type == "schedule":
             message = (
                 "Scheduling not implemented yet; ETL executed immediately. "
@@ -704,7 +1048,7 @@ async def load_source_to_db(
         logger.info(
             "No in-memory DataFrame for source_id=%s; loading from CSV on disk", source_id
         )
-        df = get_df(request, source_id)
+        df = await _get_df_async(request, source_id)
 
     if df is None:
         # Still no DataFrame -> error
@@ -808,12 +1152,27 @@ async def table_preview(request: Request, table_name: str, limit: int = 10):
 
 
 @router.get("/api/tables/{table_name}", response_class=JSONResponse)
-async def table_api(table_name: str, limit: int = Query(100, ge=1, le=10000)):
-    
+async def table_api(
+    table_name: str,
+    limit: int = Query(100, ge=1, le=10000),
+    format: str = Query("records", pattern="^(columns|records)$"),
+):
+    """
+    Table rows as JSON, as a list of row dicts by default. format=columns
+    opts into one array per column (in "columns" order), which is smaller
+    and serialized straight from numpy.
+    """
     try:
         df = read_table_as_df(table_name, limit=limit)
-        records = df.to_dict(orient="records")
-        return JSONResponse(content={"table": table_name, "row_count": len(records), "data": records})
+        payload = {"table": table_name, "row_count": len(df)}
+        if format == "columns":
+            payload["columns"] = df.columns.tolist()
+            payload["data"] = _column_arrays(df)
+        else:
+            payload["data"] = (
+                df.astype(object).where(df.notna(), None).to_dict(orient="records")
+            )
+        return Response(content=_dumps_json(payload), media_type="application/json")
     except Exception as e:
         logger.exception("Failed to serve JSON API for table '%s'", table_name)
         return JSONResponse(
@@ -822,6 +1181,75 @@ async def table_api(table_name: str, limit: int = Query(100, ge=1, le=10000)):
         )
 
 
+def _top_counts(series: pd.Series, k: int) -> tuple[list, np.ndarray]:
+    """
+    The k most frequent values of a null-free series and their counts, like
+    series.value_counts().head(k) but via one factorize + bincount (no
+    hashed count table to sort). Ties keep first-appearance order.
+    """
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes, minlength=len(uniques))
+    top = np.argsort(-counts, kind="stable")[:k]
+    return uniques[top].tolist(), counts[top]
+
+
+def _visualize_payload(df: pd.DataFrame, table_name: str, limit: int) -> tuple[str, str]:
+    """
+    (numeric_data_json, categorical_data_json) for table_visualize, as
+    script-safe JSON (see _script_json), cached on the frame's columns and
+    a hash of the values in the plotted columns.
+    """
+    # Choose numeric vs categorical from one pass over the dtypes
+    is_numeric = df.dtypes.map(pd.api.types.is_numeric_dtype).to_numpy(dtype=bool)
+    numeric_cols = df.columns[is_numeric][:3]
+    categorical_cols = df.columns[~is_numeric][:2]
+
+    # Row hashes are order-sensitive once digested, like the payload
+    # (category ties keep first-appearance order)
+    plotted = df[numeric_cols.append(categorical_cols)]
+    row_hashes = pd.util.hash_pandas_object(plotted, index=False).to_numpy()
+    key = (
+        table_name, limit, tuple(df.columns), df.shape,
+        hashlib.blake2b(row_hashes.tobytes(), digest_size=16).digest(),
+    )
+    hit = _VISUALIZE_CACHE.get(key)
+    if hit is not None:
+        _VISUALIZE_CACHE.move_to_end(key)
+        return hit
+
+    numeric_data = []
+    for col in numeric_cols:
+        series = df[col].dropna()
+        if series.empty:
+            continue
+        numeric_data.append(
+            {
+                "col": col,
+                "values": series.to_numpy(),
+            }
+        )
+
+    categorical_data = []
+    for col in categorical_cols:
+        series = df[col].dropna().astype(str)
+        if series.empty:
+            continue
+        labels, counts = _top_counts(series, 10)
+        categorical_data.append(
+            {
+                "col": col,
+                "labels": labels,
+                "values": counts,
+            }
+        )
+
+    payload = (_script_json(numeric_data), _script_json(categorical_data))
+    _VISUALIZE_CACHE[key] = payload
+    while len(_VISUALIZE_CACHE) > VISUALIZE_CACHE_SIZE:
+        _VISUALIZE_CACHE.popitem(last=False)
+    return payload
+
+
 @router.get("/tables/{table_name}/visualize", response_class=HTMLResponse)
 async def table_visualize(
     request: Request,
@@ -840,7 +1268,8 @@ async def table_visualize(
         df = read_table_as_df(table_name, limit=limit)
     except Exception as e:
         logger.exception("Failed to read table '%s' for visualization", table_name)
-        return templates.TemplateResponse(
+        return _render_html(
+            templates,
             "partials/table_visualize.html",
             {
                 "request": request,
@@ -851,52 +1280,17 @@ async def table_visualize(
             },
         )
 
-    # Choose numeric vs categorical
-    numeric_cols = [
-        c for c in df.columns
-        if pd.api.types.is_numeric_dtype(df[c])
-    ]
-    categorical_cols = [
-        c for c in df.columns
-        if not pd.api.types.is_numeric_dtype(df[c])
-    ]
-
-    numeric_data = []
-    for col in numeric_cols[:3]:
-        series = df[col].dropna()
-        if series.empty:
-            continue
-        numeric_data.append(
-            {
-                "col": col,
-                "values": series.tolist(),
-            }
-        )
+    numeric_data_json, categorical_data_json = _visualize_payload(df, table_name, limit)
 
-    categorical_data = []
-    for col in categorical_cols[:2]:
-        series = df[col].dropna().astype(str)
-        if series.empty:
-            continue
-        vc = series.value_counts().head(10)
-        if vc.empty:
-            continue
-        categorical_data.append(
-            {
-                "col": col,
-                "labels": list(vc.index),
-                "values": [int(v) for v in vc.values],
-            }
-        )
-
-    return templates.TemplateResponse(
+    return _render_html(
+        templates,
         "partials/table_visualize.html",
         {
             "request": request,
             "table_name": table_name,
             "error": None,
             # pre-dumped JSON so we don't need extra Jinja filters
-            "numeric_data_json": json.dumps(numeric_data),
-            "categorical_data_json": json.dumps(categorical_data),
+            "numeric_data_json": numeric_data_json,
+            "categorical_data_json": categorical_data_json,
         },
     )
@@ -2,11 +2,14 @@
 import pandas as pd
 import pytest
 
+# Same pandas semantics as production (src/main.py enables copy-on-write)
+pd.set_option("mode.copy_on_write", True)
 
-@pytest.fixture
-def sample_df():
+
+@pytest.fixture(scope="session")
+def _sample_df_immutable():
     """
-    Small DataFrame for pipeline/db tests.
+    Built once per test session; tests get copies through sample_df.
     """
     return pd.DataFrame(
         {
@@ -15,3 +18,12 @@ def sample_df():
             "flag": [True, False, True],
         }
     )
+
+
+@pytest.fixture
+def sample_df(_sample_df_immutable):
+    """
+    Small DataFrame for pipeline/db tests.
+    A fresh copy per test, so tests may mutate it.
+    """
+    return _sample_df_immutable.copy()
@@ -0,0 +1,138 @@
+# tests/test_db_connection.py
+from contextlib import contextmanager
+
+import pytest
+from psycopg_pool import PoolTimeout
+
+from src.utils import db as db_module
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    """
+    Stands in for psycopg_pool.ConnectionPool: commit on success,
+    rollback on error, like ConnectionPool.connection().
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.conn = FakeConnection()
+        self.closed = False
+        self.fail = False
+
+    @contextmanager
+    def connection(self):
+        if self.fail:
+            raise PoolTimeout("couldn't get a connection")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+
+    def close(self):
+        self.closed = True
+
+    check_connection = staticmethod(lambda conn: None)
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    made = []
+
+    def _fake_pool(**kwargs):
+        pool = FakePool(**kwargs)
+        made.append(pool)
+        return pool
+
+    _fake_pool.check_connection = FakePool.check_connection
+    monkeypatch.setattr(db_module, "ConnectionPool", _fake_pool)
+    monkeypatch.setattr(db_module, "_pool", None)
+    yield made
+    db_module.close_db_connection()
+
+
+def test_get_db_connection_opens_pool_once(fake_pool):
+    with db_module.get_db_connection() as first:
+        pass
+    with db_module.get_db_connection() as second:
+        pass
+
+    assert len(fake_pool) == 1
+    assert fake_pool[0].kwargs["kwargs"]["dbname"] == db_module.config["database"]["name"]
+    assert first is second
+    assert first.commits == 2
+
+
+def test_get_db_connection_rolls_back_on_error(fake_pool):
+    with pytest.raises(RuntimeError):
+        with db_module.get_db_connection():
+            raise RuntimeError("boom")
+
+    conn = fake_pool[0].conn
+    assert conn.rollbacks == 1
+    assert conn.commits == 0
+
+
+def test_get_db_connection_raises_when_unavailable(fake_pool):
+    with db_module.get_db_connection():
+        pass
+    fake_pool[0].fail = True
+
+    with pytest.raises(PoolTimeout):
+        with db_module.get_db_connection():
+            pytest.fail("body must not run without a connection")
+
+
+def test_close_db_connection_closes_pool(fake_pool):
+    with db_module.get_db_connection():
+        pass
+    db_module.close_db_connection()
+    with db_module.get_db_connection():
+        pass
+
+    assert len(fake_pool) == 2
+    assert fake_pool[0].closed
+
+
+def test_delete_data_sources_and_list_uses_one_statement(fake_pool, monkeypatch):
+    executed = []
+
+    class FakeCursor:
+        description = [("id",), ("name",)]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            executed.append((sql, params))
+
+        def fetchall(self):
+            return [(3, "kept.csv")]
+
+    monkeypatch.setattr(FakeConnection, "cursor", lambda self: FakeCursor(), raising=False)
+
+    remaining = db_module.delete_data_sources_and_list([1, 2])
+
+    assert remaining == [{"id": 3, "name": "kept.csv"}]
+    assert len(executed) == 1
+    sql, params = executed[0]
+    assert "DELETE FROM data_sources" in sql and "NOT IN" in sql
+    assert params == ([1, 2],)
+    assert fake_pool[0].conn.commits == 1
@@ -1,4 +1,6 @@
 # tests/test_db_load_dataframe.py
+import struct
+
 import pandas as pd
 import pytest
 
@@ -6,16 +8,26 @@ from src.utils import db as db_module
 
 
 class DummyCursor:
+    __slots__ = ("_stmts", "_params", "executemany_calls")
+
     def __init__(self):
-        self.executed = []
+        self._stmts = []
+        self._params = []
         self.executemany_calls = []
 
     def execute(self, stmt, params=None):
-        # Just store statement (as string) and params for assertions
-        self.executed.append((str(stmt), params))
+        # Store the statement object as-is; assertions stringify what they check
+        self._stmts.append(stmt)
+        self._params.append(params)
+
+    @property
+    def executed(self):
+        # (stmt, params) pairs, only built when a test inspects them
+        return list(zip(self._stmts, self._params))
 
     def executemany(self, stmt, seq_of_params):
-        self.executemany_calls.append((str(stmt), list(seq_of_params)))
+        # Keep a reference to the params iterable instead of copying it
+        self.executemany_calls.append((stmt, seq_of_params))
 
     def __enter__(self):
         return self
@@ -44,6 +56,40 @@ class DummyConnection:
         return False
 
 
+class DummyCopy:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class DummyCopyCursor(DummyCursor):
+    __slots__ = ("copy_calls",)
+
+    def __init__(self):
+        super().__init__()
+        self.copy_calls = []
+
+    def copy(self, stmt):
+        cp = DummyCopy()
+        self.copy_calls.append((str(stmt), cp))
+        return cp
+
+
+class DummyCopyConnection(DummyConnection):
+    def cursor(self):
+        c = DummyCopyCursor()
+        self.cursors.append(c)
+        return c
+
+
 @pytest.fixture
 def dummy_conn(monkeypatch):
     conn = DummyConnection()
@@ -55,10 +101,21 @@ def dummy_conn(monkeypatch):
     return conn
 
 
+@pytest.fixture
+def dummy_copy_conn(monkeypatch):
+    conn = DummyCopyConnection()
+    monkeypatch.setattr(db_module, "get_db_connection", lambda: conn)
+    return conn
+
+
+def _insert_calls(cursor):
+    return [(stmt, params) for stmt, params in cursor.executed if "INSERT INTO" in str(stmt)]
+
+
 def test_load_dataframe_to_table_overwrite_mode(sample_df, dummy_conn):
     """
     - In overwrite mode, table is dropped and recreated.
-    - Rows are inserted with executemany.
+    - Rows are inserted with one multi-row INSERT.
     """
     table_name = "test_table"
 
@@ -68,16 +125,17 @@ def test_load_dataframe_to_table_overwrite_mode(sample_df, dummy_conn):
     assert len(dummy_conn.cursors) == 1
     cursor = dummy_conn.cursors[0]
 
-    # At least 2 execute calls: DROP TABLE, CREATE TABLE, plus INSERT via executemany
-    executed_stmts = [stmt for stmt, _ in cursor.executed]
+    # DROP TABLE, CREATE TABLE, then the INSERT
+    executed_stmts = [str(stmt) for stmt, _ in cursor.executed]
     assert any("DROP TABLE IF EXISTS" in s for s in executed_stmts)
     assert any("CREATE TABLE" in s for s in executed_stmts)
 
-    assert len(cursor.executemany_calls) == 1
-    insert_stmt, rows = cursor.executemany_calls[0]
-    assert "INSERT INTO" in insert_stmt
-    # 3 rows in sample_df
-    assert len(rows) == 3
+    inserts = _insert_calls(cursor)
+    assert len(inserts) == 1
+    # 3 rows x 3 columns in sample_df, NaN sent as None
+    params = inserts[0][1]
+    assert len(params) == 9
+    assert params[4] is None
 
     # commit should be called once
     assert dummy_conn.commits == 1
@@ -94,7 +152,7 @@ def test_load_dataframe_to_table_append_mode_creates_if_not_exists(sample_df, du
     db_module.load_dataframe_to_table(sample_df, table_name=table_name, mode="append")
 
     cursor = dummy_conn.cursors[-1]  # last used cursor
-    executed_stmts = [stmt for stmt, _ in cursor.executed]
+    executed_stmts = [str(stmt) for stmt, _ in cursor.executed]
 
     # No plain DROP TABLE in append mode
     assert not any("DROP TABLE IF EXISTS" in s for s in executed_stmts)
@@ -103,9 +161,9 @@ def test_load_dataframe_to_table_append_mode_creates_if_not_exists(sample_df, du
     assert any("CREATE TABLE IF NOT EXISTS" in s for s in executed_stmts)
 
     # rows still inserted
-    assert len(cursor.executemany_calls) == 1
-    _, rows = cursor.executemany_calls[0]
-    assert len(rows) == 3
+    inserts = _insert_calls(cursor)
+    assert len(inserts) == 1
+    assert len(inserts[0][1]) == 9
 
 
 def test_load_dataframe_to_table_empty_dataframe_skips(dummy_conn):
@@ -133,3 +191,67 @@ def test_load_dataframe_to_table_invalid_table_name_raises(sample_df, dummy_conn
     # No SQL run, no commits
     assert len(dummy_conn.cursors) == 0
     assert dummy_conn.commits == 0
+
+
+def test_load_dataframe_to_table_uses_copy_when_available(sample_df, dummy_copy_conn):
+    """
+    If the cursor supports COPY, rows are streamed as CSV with COPY FROM STDIN
+    (no executemany) and NaN values are sent as the \\N null marker.
+    """
+    db_module.load_dataframe_to_table(sample_df, table_name="copy_table", mode="overwrite")
+
+    cursor = dummy_copy_conn.cursors[0]
+    assert cursor.executemany_calls == []
+
+    assert len(cursor.copy_calls) == 1
+    copy_stmt, cp = cursor.copy_calls[0]
+    assert "COPY" in copy_stmt
+    assert "FROM STDIN" in copy_stmt
+
+    lines = "".join(cp.chunks).splitlines()
+    assert len(lines) == 3
+    assert lines[1].split(",")[1] == "\\N"
+    assert dummy_copy_conn.commits == 1
+
+
+def test_load_dataframe_to_table_batches_inserts(monkeypatch, dummy_conn):
+    """
+    Without COPY, rows go out in INSERT_BATCH_ROWS-sized multi-row INSERTs.
+    """
+    monkeypatch.setattr(db_module, "INSERT_BATCH_ROWS", 2)
+    df = pd.DataFrame({"a": range(5), "b": list("vwxyz")})
+
+    db_module.load_dataframe_to_table(df, table_name="batched", mode="append")
+
+    inserts = _insert_calls(dummy_conn.cursors[0])
+    assert [len(params) for _, params in inserts] == [4, 4, 2]
+    assert [p for _, params in inserts for p in params] == [
+        0, "v", 1, "w", 2, "x", 3, "y", 4, "z"
+    ]
+    assert dummy_conn.cursors[0].executemany_calls == []
+
+
+def test_rows_from_df_matches_itertuples_with_nulls(sample_df):
+    rows = list(db_module._rows_from_df(sample_df))
+
+    assert rows == [(1, 10.5, True), (2, None, False), (3, 30.0, True)]
+    assert type(rows[0][0]) is int and type(rows[0][2]) is bool
+
+
+def test_load_dataframe_to_table_binary_copy_for_numeric_frames(dummy_copy_conn):
+    """
+    All-numeric frames without NULLs are sent with COPY ... (FORMAT BINARY).
+    """
+    df = pd.DataFrame({"a": [1, -2], "b": [0.5, 2.0], "c": [True, False]})
+
+    db_module.load_dataframe_to_table(df, table_name="bin_table", mode="overwrite")
+
+    copy_stmt, cp = dummy_copy_conn.cursors[0].copy_calls[0]
+    assert "FORMAT BINARY" in copy_stmt
+
+    row = lambda a, b, c: struct.pack(">hiqidi?", 3, 8, a, 8, b, 1, c)
+    assert b"".join(cp.chunks) == (
+        b"PGCOPY\n\xff\r\n\x00" + b"\x00" * 8
+        + row(1, 0.5, True) + row(-2, 2.0, False)
+        + b"\xff\xff"
+    )
@@ -0,0 +1,90 @@
+# tests/test_helpers.py
+import numpy as np
+import pandas as pd
+
+from src.utils.helpers import DFCache, count_nulls, first_k_distinct, frame_nbytes
+
+
+def test_first_k_distinct_matches_unique_prefix():
+    s = pd.Series([None] * 10 + [3, 3, 1, np.nan, 1, 2, 5, 4])
+    assert first_k_distinct(s, 3, start=4) == list(s.dropna().unique()[:3])
+
+
+def test_first_k_distinct_stops_after_k_values():
+    # Unhashable values past the first block would make unique() raise,
+    # so this only passes if the scan never reaches them
+    s = pd.Series(["a", "b", "c", "a"] + [[1]] * 100, dtype=object)
+    assert first_k_distinct(s, 3, start=4) == ["a", "b", "c"]
+
+
+def test_first_k_distinct_short_or_empty_columns():
+    assert first_k_distinct(pd.Series([None, None]), 3) == []
+    assert first_k_distinct(pd.Series(["x"] * 50), 3, start=8) == ["x"]
+
+
+def test_count_nulls_matches_isna_sum():
+    df = pd.DataFrame(
+        {
+            "f": [1.0, np.nan, np.nan],
+            "i": [1, 2, 3],
+            "b": [True, False, True],
+            "s": ["x", None, "z"],
+            "n": pd.array([None, 2, None], dtype="Int64"),
+            "d": [pd.Timestamp("2020-01-01"), pd.NaT, pd.NaT],
+        }
+    )
+    assert count_nulls(df) == df.isna().sum().tolist()
+    assert count_nulls(df.iloc[:0]) == [0] * df.shape[1]
+
+
+def test_dfcache_evicts_least_recently_used_over_budget():
+    a = pd.DataFrame({"x": np.zeros(100)})
+    size = int(a.memory_usage(index=True, deep=True).sum())
+    cache = DFCache(max_bytes=2 * size)
+
+    cache[1] = a
+    cache[2] = a.copy()
+    assert cache.get(1) is a  # 1 becomes most recently used
+    cache[3] = a.copy()
+
+    assert 2 not in cache
+    assert list(cache) == [1, 3]
+    assert cache.total_bytes == 2 * size
+
+    cache.pop(1)
+    assert cache.total_bytes == size
+
+
+def test_dfcache_keeps_newest_frame_even_if_over_budget():
+    cache = DFCache(max_bytes=1)
+    df = pd.DataFrame({"x": [1, 2, 3]})
+    cache[1] = df
+    assert cache[1] is df
+    assert len(cache) == 1
+
+
+def test_dfcache_never_evicts_dirty_frames():
+    a = pd.DataFrame({"x": np.zeros(100)})
+    size = frame_nbytes(a)
+    cache = DFCache(max_bytes=2 * size)
+
+    cache[1] = a
+    cache.mark_dirty(1)
+    cache[2] = a.copy()
+    cache[3] = a.copy()
+
+    # 1 is the least recently used but has unsaved edits; 2 goes instead
+    assert list(cache) == [1, 3]
+    assert cache.is_dirty(1)
+
+    cache.mark_clean(1)
+    cache[4] = a.copy()
+    assert list(cache) == [3, 4]
+
+
+def test_frame_nbytes_estimates_object_columns():
+    df = pd.DataFrame({"s": [f"value-{i}" for i in range(50_000)], "x": np.arange(50_000)})
+    exact = int(df.memory_usage(index=True, deep=True).sum())
+
+    assert frame_nbytes(df.head(500)) == int(df.head(500).memory_usage(index=True, deep=True).sum())
+    assert abs(frame_nbytes(df) - exact) < 0.05 * exact
@@ -0,0 +1,42 @@
+# tests/test_logger.py
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from src.utils import logger as logger_module
+
+
+@pytest.fixture
+def tmp_logging(tmp_path, monkeypatch):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    log_file = tmp_path / "app.log"
+    monkeypatch.setitem(
+        logger_module.config,
+        "logging",
+        {"file": str(log_file), "console": False, "format": "%(message)s"},
+    )
+    yield log_file
+    logger_module.shutdown_logging()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        if handler not in saved_handlers:
+            handler.close()
+    for handler in saved_handlers:
+        root.addHandler(handler)
+    root.setLevel(saved_level)
+
+
+def test_records_logged_after_shutdown_are_written(tmp_logging):
+    logger_module.setup_logging()
+    log = logger_module.get_logger("test_logger")
+
+    log.info("before shutdown")
+    logger_module.shutdown_logging()
+    log.info("during teardown")
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+    assert not any(isinstance(h, QueueHandler) for h in logging.getLogger().handlers)
+    assert tmp_logging.read_text().splitlines() == ["before shutdown", "during teardown"]
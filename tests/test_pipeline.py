@@ -1,4 +1,5 @@
 # tests/test_pipeline.py
+import numpy as np
 import pandas as pd
 
 from src.utils.pipeline import (
@@ -7,6 +8,8 @@ from src.utils.pipeline import (
     get_steps_for_source,
     build_pipeline_config,
     apply_pipeline_to_df,
+    compile_pipeline,
+    drop_null_rows,
 )
 
 
@@ -55,10 +58,19 @@ def test_add_step_drop_columns_records_step():
     assert step["op"] == "drop_columns"
     # Accept both {"columns": [...] } and {"params": {"columns": [...]}}
     columns = _get_param(step, "columns")
-    assert columns == cols_to_drop
+    assert list(columns) == cols_to_drop
 
 
-def test_get_steps_for_source_returns_list():
+def test_recorded_op_renders_as_plain_name():
+    pipeline_store = {}
+    add_step_drop_columns(pipeline_store, 1, ["value"])
+
+    op = pipeline_store[1][0]["op"]
+    assert str(op) == "drop_columns"
+    assert f"{op}" == "drop_columns"
+
+
+def test_get_steps_for_source_returns_snapshot():
     pipeline_store = {
         1: [{"op": "drop_rows_with_nulls"}],
         2: [{"op": "drop_columns"}],
@@ -69,8 +81,8 @@ def test_get_steps_for_source_returns_list():
 
     assert len(steps_for_1) == 1
     assert steps_for_1[0]["op"] == "drop_rows_with_nulls"
-    # Missing source returns empty list, not KeyError
-    assert steps_for_3 == []
+    # Missing source returns an empty snapshot, not KeyError
+    assert steps_for_3 == ()
 
 
 def test_build_pipeline_config_includes_operations():
@@ -141,3 +153,213 @@ def test_apply_pipeline_to_df_drop_rows_and_columns(sample_df):
         assert transformed.shape[1] == 3
     else:
         assert transformed.shape[1] == 2
+
+
+def test_apply_pipeline_to_df_fused_drops_respect_step_order(sample_df):
+    df = sample_df  # 'value' has one NaN
+
+    # Dropping the column first means the null check never sees it
+    drop_first = apply_pipeline_to_df(
+        df,
+        [{"op": "drop_columns", "columns": ["value"]}, {"op": "drop_rows_with_nulls"}],
+    )
+    assert drop_first.shape == (3, 2)
+
+    # Null check first removes the NaN row, then the column goes
+    nulls_first = apply_pipeline_to_df(
+        df,
+        [
+            {"op": "drop_rows_with_nulls"},
+            {"op": "drop_columns", "columns": ["value"]},
+            {"op": "drop_columns", "columns": ["flag"]},
+        ],
+    )
+    assert list(nulls_first.columns) == ["id"]
+    assert nulls_first["id"].tolist() == [1, 3]
+
+
+def test_compile_pipeline_is_cached_on_step_content(sample_df):
+    steps = [{"op": "drop_rows_with_nulls"}, {"op": "drop_columns", "columns": ["flag"]}]
+
+    run = compile_pipeline(steps)
+    # An equal (but distinct) step list resolves to the same compiled function
+    assert compile_pipeline([dict(s) for s in steps]) is run
+
+    pd.testing.assert_frame_equal(run(sample_df), apply_pipeline_to_df(sample_df, steps))
+
+
+def test_add_step_columns_are_shared_across_sources():
+    pipeline_store = {}
+
+    add_step_drop_columns(pipeline_store, 1, ["value", "flag"])
+    add_step_drop_columns(pipeline_store, 2, ["value", "flag"])
+    add_step_drop_rows_with_nulls(pipeline_store, 3, subset=["value", "flag"])
+
+    cols_1 = pipeline_store[1][0]["columns"]
+    assert cols_1 is pipeline_store[2][0]["columns"]
+    assert cols_1 is pipeline_store[3][0]["subset"]
+
+
+def test_shared_column_tuples_are_bounded():
+    from src.utils import pipeline as pipeline_module
+
+    pipeline_store = {}
+    for i in range(pipeline_module.COL_TUPLE_CACHE_SIZE + 10):
+        add_step_drop_columns(pipeline_store, 1, [f"col_{i}"])
+
+    info = pipeline_module._shared_columns.cache_info()
+    assert info.currsize <= pipeline_module.COL_TUPLE_CACHE_SIZE
+
+
+def test_build_pipeline_config_memoized_until_steps_change():
+    pipeline_store = {}
+    add_step_drop_rows_with_nulls(pipeline_store, 7)
+    steps = get_steps_for_source(pipeline_store, 7)
+
+    cfg = build_pipeline_config(7, "src.csv", steps)
+    assert build_pipeline_config(7, "src.csv", steps) is cfg
+
+    add_step_drop_columns(pipeline_store, 7, ["flag"])
+    steps = get_steps_for_source(pipeline_store, 7)
+    updated = build_pipeline_config(7, "src.csv", steps)
+    assert updated is not cfg
+    assert len(updated["steps"]) == 2
+
+
+def test_get_steps_for_source_snapshot_is_read_only():
+    pipeline_store = {}
+    add_step_drop_rows_with_nulls(pipeline_store, 1)
+
+    steps = get_steps_for_source(pipeline_store, 1)
+
+    assert isinstance(steps, tuple)
+    add_step_drop_columns(pipeline_store, 1, ["flag"])
+    # snapshot does not change when new steps are recorded
+    assert len(steps) == 1
+    assert len(get_steps_for_source(pipeline_store, 1)) == 2
+
+
+def test_apply_pipeline_to_df_no_op_returns_input(sample_df):
+    assert apply_pipeline_to_df(sample_df, []) is sample_df
+
+    # Every step resolves to nothing: unknown column, null check on a
+    # column that cannot hold nulls
+    steps = [
+        {"op": "drop_columns", "columns": ["missing"]},
+        {"op": "drop_rows_with_nulls", "subset": ["id"]},  # int column, no nulls possible
+    ]
+    assert apply_pipeline_to_df(sample_df, steps) is sample_df
+
+    copied = apply_pipeline_to_df(sample_df, steps, copy=True)
+    assert copied is not sample_df
+    pd.testing.assert_frame_equal(copied, sample_df)
+
+
+def test_add_step_drop_rows_with_nulls_normalizes_subset():
+    pipeline_store = {}
+
+    add_step_drop_rows_with_nulls(pipeline_store, 1, subset=["value", "id", "value"])
+
+    assert pipeline_store[1][0]["subset"] == ("value", "id")
+
+
+def test_apply_pipeline_to_csv_reads_only_needed_columns(tmp_path, sample_df):
+    from src.utils.pipeline import apply_pipeline_to_csv
+
+    csv_path = tmp_path / "source_1.csv"
+    sample_df.to_csv(csv_path, index=False)
+    steps = [
+        {"op": "drop_rows_with_nulls", "subset": ["value"]},
+        {"op": "drop_columns", "columns": ["value", "flag"]},
+    ]
+    reads = []
+
+    def reader(path, **kwargs):
+        reads.append(kwargs)
+        return pd.read_csv(path, **kwargs)
+
+    out = apply_pipeline_to_csv(csv_path, steps, reader=reader)
+
+    # 'flag' is dropped and never null-checked, so it is not read at all
+    assert reads == [{"usecols": ["id", "value"]}]
+    pd.testing.assert_frame_equal(out, apply_pipeline_to_df(pd.read_csv(csv_path), steps))
+
+    # Unchanged file -> served from cache without reading again
+    assert apply_pipeline_to_csv(csv_path, steps, reader=reader) is out
+    assert len(reads) == 1
+
+
+def test_apply_pipeline_to_csv_reuses_last_parse_for_new_steps(tmp_path, sample_df):
+    from src.utils.pipeline import apply_pipeline_to_csv
+
+    csv_path = tmp_path / "source_1.csv"
+    sample_df.to_csv(csv_path, index=False)
+    reads = []
+
+    def reader(path, **kwargs):
+        reads.append(kwargs)
+        return pd.read_csv(path, **kwargs)
+
+    first = [{"op": "drop_rows_with_nulls", "subset": ["value"]}]
+    apply_pipeline_to_csv(csv_path, first, reader=reader)
+
+    # A longer pipeline needs a subset of the columns already parsed
+    second = first + [{"op": "drop_columns", "columns": ["flag"]}]
+    out = apply_pipeline_to_csv(csv_path, second, reader=reader)
+
+    assert len(reads) == 1
+    pd.testing.assert_frame_equal(out, apply_pipeline_to_df(pd.read_csv(csv_path), second))
+
+
+def test_drop_null_rows_skips_copy_when_clean():
+    clean = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]})
+    assert drop_null_rows(clean) is clean
+
+    dirty = pd.DataFrame({"a": [1.0, None, 3.0], "b": ["x", "y", None]})
+    pd.testing.assert_frame_equal(drop_null_rows(dirty), dirty.dropna(how="any"))
+    pd.testing.assert_frame_equal(
+        drop_null_rows(dirty, subset=["a"]), dirty.dropna(how="any", subset=["a"])
+    )
+
+
+def test_replay_cache_stays_within_byte_budget(tmp_path, monkeypatch):
+    from src.utils import pipeline as pipeline_module
+    from src.utils.helpers import frame_nbytes
+
+    df = pd.DataFrame({"a": np.arange(1000, dtype="float64"), "b": np.arange(1000)})
+    budget = 3 * frame_nbytes(df)
+    monkeypatch.setattr(pipeline_module, "_replay_cache", type(pipeline_module._replay_cache)())
+    monkeypatch.setattr(pipeline_module, "_replay_bytes", 0)
+    monkeypatch.setattr(pipeline_module, "REPLAY_CACHE_MAX_BYTES", budget)
+
+    steps = [{"op": "drop_rows_with_nulls"}]
+    for i in range(6):
+        csv_path = tmp_path / f"source_{i}.csv"
+        df.to_csv(csv_path, index=False)
+        pipeline_module.apply_pipeline_to_csv(csv_path, steps)
+
+        sizes = [nbytes for _, nbytes in pipeline_module._replay_cache.values()]
+        assert sum(sizes) == pipeline_module._replay_bytes <= budget
+
+    # each file adds a raw parse and a result of about one frame each
+    assert len(pipeline_module._replay_cache) <= 3
+
+
+def test_apply_pipeline_to_csv_sees_replaced_file_with_same_mtime_and_size(tmp_path):
+    import os
+
+    from src.utils.pipeline import apply_pipeline_to_csv
+
+    csv_path = tmp_path / "source_1.csv"
+    csv_path.write_text("a,b\n1,x\n2,y\n")
+    steps = [{"op": "drop_columns", "columns": ["b"]}]
+    assert apply_pipeline_to_csv(csv_path, steps)["a"].tolist() == [1, 2]
+
+    # Same size and mtime, new inode (saved through a temp file + rename)
+    st = csv_path.stat()
+    tmp = tmp_path / "source_1.csv.part"
+    tmp.write_text("a,b\n3,x\n4,y\n")
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    tmp.replace(csv_path)
+
+    assert apply_pipeline_to_csv(csv_path, steps)["a"].tolist() == [3, 4]
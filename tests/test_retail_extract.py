@@ -1,10 +1,11 @@
 # tests/test_retail_extract.py
+import os
 from pathlib import Path
 
 import pandas as pd
 import pytest
 
-from src.etl.retail.extract import extract_retail
+from src.etl.retail.extract import extract_retail, _load_dim
 
 
 def _write_csv(path: Path, data: dict) -> None:
@@ -100,3 +101,18 @@ def test_extract_retail_missing_stores_raises(tmp_path):
         )
 
     assert "store_cities.csv not found" in str(exc.value)
+
+
+def test_load_dim_rereads_when_file_changes(tmp_path):
+    products_csv = tmp_path / "product_hierarchy.csv"
+    _write_csv(products_csv, {"product_id": [1], "name": ["P"]})
+
+    first = _load_dim(products_csv)
+    first.loc[0, "name"] = "mutated"  # must not leak into the cache
+    assert _load_dim(products_csv).loc[0, "name"] == "P"
+
+    _write_csv(products_csv, {"product_id": [1, 2], "name": ["P", "Q"]})
+    st = products_csv.stat()
+    os.utime(products_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert len(_load_dim(products_csv)) == 2
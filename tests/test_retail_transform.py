@@ -1,5 +1,7 @@
 # tests/test_retail_transform.py
 
+import warnings
+
 import pandas as pd
 import pytest
 
@@ -11,7 +13,9 @@ from src.etl.retail.transform import (
     _drop_na_rows,
     _remove_outliers_iqr,
     _parse_dates_if_present,
+    _detect_date_format,
     transform_sales,
+    transform_sales_chunks,
     transform_products,
     transform_stores,
     join_sales_products_stores,
@@ -152,6 +156,14 @@ def test_parse_dates_if_present_converts_date_columns():
     assert str(out["sale_date"].dtype).startswith("datetime64")
     assert str(out["not_date"].dtype).startswith("datetime64")
 
+
+def test_detect_date_format_picks_matching_format():
+    assert _detect_date_format(pd.Series(["2024-01-01", None, "2024-02-02"])) == "%Y-%m-%d"
+    assert _detect_date_format(pd.Series(["2024-01-01 10:00:00"])) == "%Y-%m-%d %H:%M:%S"
+    assert _detect_date_format(pd.Series(["25/12/2024"])) == "%d/%m/%Y"
+    # no known format -> let pandas infer
+    assert _detect_date_format(pd.Series(["Jan 1 2024"])) is None
+
 # ---------- public transforms ----------
 
 def test_transform_sales_basic_cleaning():
@@ -187,6 +199,31 @@ def test_transform_sales_basic_cleaning():
     assert str(out["sale_date"].dtype).startswith("datetime64")
 
 
+def test_transform_sales_chunks_matches_full_frame():
+    sales_df = pd.DataFrame(
+        {
+            "ProductID": [101, 101, 102, None, 103, 101],
+            "StoreID": [1, 1, 2, 2, 3, 1],
+            "sale_date": ["2024-01-01", "2024-01-01", "2024-01-02", None, "2024-01-03", "2024-01-01"],
+            "amount": [10.0, 10.0, 20.0, 30.0, 40.0, 10.0],
+            "all_na": [None] * 6,
+        }
+    )
+    chunks = [sales_df.iloc[:3], sales_df.iloc[3:]]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", pd.errors.SettingWithCopyWarning)
+        out = transform_sales_chunks(iter(chunks))
+    expected = transform_sales(sales_df)
+
+    # the caller's chunks are left untouched
+    assert [list(c.columns) for c in chunks] == [list(sales_df.columns)] * 2
+
+    pd.testing.assert_frame_equal(
+        out.reset_index(drop=True), expected.reset_index(drop=True)
+    )
+
+
 def test_transform_products_cleaning():
     products_df = pd.DataFrame(
         {
@@ -292,3 +329,24 @@ def test_join_sales_products_stores_missing_keys_no_crash():
 
     # In this case, nothing to join on, so it should just be a copy of sales
     pd.testing.assert_frame_equal(sales_df, enriched)
+
+
+def test_join_sales_products_stores_categorical_keys():
+    # Keys standardized to categories with different category sets per frame
+    sales_df = _standardize_key(
+        pd.DataFrame({"product_id": ["P1", "P2", "P3"], "amount": [1.0, 2.0, 3.0]}),
+        ["product_id"], "product_id",
+    )
+    products_df = _standardize_key(
+        pd.DataFrame({"product_id": ["P3", " P1 "], "category": ["C", "A"]}),
+        ["product_id"], "product_id",
+    )
+    stores_df = pd.DataFrame({"another_col": [2]})
+
+    enriched = join_sales_products_stores(sales_df, products_df, stores_df)
+
+    assert isinstance(sales_df["product_id"].dtype, pd.CategoricalDtype)
+    assert list(enriched["product_id"]) == ["P1", "P2", "P3"]
+    assert enriched.loc[0, "category"] == "A"
+    assert pd.isna(enriched.loc[1, "category"])
+    assert enriched.loc[2, "category"] == "C"
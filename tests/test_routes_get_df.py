@@ -1,6 +1,7 @@
 # tests/test_routes_get_df.py
 from pathlib import Path
 import pandas as pd
+import pytest
 
 from src.web import routes as routes_module
 
@@ -84,3 +85,218 @@ def test_get_df_returns_none_when_file_missing(tmp_path, monkeypatch, caplog):
 
     df = routes_module.get_df(request, source_id)
     assert df is None
+
+
+def test_preview_table_html_is_cached_per_dataframe():
+    df = pd.DataFrame({"a": [1, 2], "b": [3, 4]})
+
+    html = routes_module._preview_table_html(df, 1)
+    assert routes_module._preview_table_html(df, 1) is html
+
+    # A new frame (as stored by every clean/drop step) re-renders
+    changed = df[["a"]]
+    changed_html = routes_module._preview_table_html(changed, 1)
+    assert changed_html is not html
+    assert "<th>b</th>" not in changed_html
+
+
+def test_render_preview_table_escapes_and_marks_nulls():
+    df = pd.DataFrame({"a<b": [1, None], "s": ["<x>", "y"]})
+
+    out = routes_module._render_preview_table(df)
+
+    assert out.startswith('<table border="1" class="dataframe preview-table">')
+    assert "<th>a&lt;b</th>" in out
+    assert "<td>&lt;x&gt;</td>" in out
+    assert "<td>NaN</td>" in out
+    assert out.count("<tr>") == 2  # body rows (header row has a style attr)
+
+
+def test_render_preview_table_shortens_floats():
+    df = pd.DataFrame({"f": [1 / 3, float("nan")], "i": [10**12, 2]})
+
+    out = routes_module._render_preview_table(df)
+
+    assert "<td>0.333333</td>" in out
+    assert "<td>NaN</td>" in out
+    assert "<td>1000000000000</td>" in out  # ints keep every digit
+
+
+def test_get_df_prefers_fresh_sidecar_over_csv(tmp_path, monkeypatch):
+    import os
+
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(routes_module, "DATA_SOURCES_DIR", tmp_path)
+    source_id = 3
+    csv_path = tmp_path / f"source_{source_id}.csv"
+    pd.DataFrame({"x": [1, 2]}).to_csv(csv_path, index=False)
+
+    # Sidecar keeps dtypes the CSV would lose
+    saved = pd.DataFrame({"x": pd.Categorical(["a", "b"])})
+    routes_module._write_sidecar(saved, source_id)
+
+    df = routes_module.get_df(DummyRequest(), source_id)
+    pd.testing.assert_frame_equal(df, saved)
+
+    # A CSV edited after the sidecar wins
+    st = csv_path.stat()
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+    df = routes_module.get_df(DummyRequest(), source_id)
+    assert df["x"].tolist() == [1, 2]
+
+
+def test_dumps_json_handles_numpy_with_and_without_orjson(monkeypatch):
+    import json
+    import numpy as np
+
+    payload = [{"col": "x", "values": np.array([1.5, 2.0]), "n": np.int64(3)}]
+    expected = [{"col": "x", "values": [1.5, 2.0], "n": 3}]
+
+    assert json.loads(routes_module._dumps_json(payload)) == expected
+    monkeypatch.setattr(routes_module, "orjson", None)
+    assert json.loads(routes_module._dumps_json(payload)) == expected
+
+
+def test_table_api_columnar_and_records_formats(monkeypatch):
+    import asyncio
+    import inspect
+    import json
+    import numpy as np
+
+    df = pd.DataFrame(
+        {
+            "a": [1.5, np.nan],
+            "s": ["x", None],
+            "d": [pd.Timestamp("2020-01-01"), pd.NaT],
+        }
+    )
+    monkeypatch.setattr(routes_module, "read_table_as_df", lambda name, limit: df)
+
+    resp = asyncio.run(routes_module.table_api("t", limit=10, format="columns"))
+    body = json.loads(resp.body)
+    assert body["columns"] == ["a", "s", "d"]
+    assert body["data"] == [[1.5, None], ["x", None], ["2020-01-01T00:00:00", None]]
+    assert body["row_count"] == 2
+
+    records = [
+        {"a": 1.5, "s": "x", "d": "2020-01-01T00:00:00"},
+        {"a": None, "s": None, "d": None},
+    ]
+    resp = asyncio.run(routes_module.table_api("t", limit=10, format="records"))
+    assert json.loads(resp.body)["data"] == records
+
+    # records stays the default shape for existing clients
+    format_param = inspect.signature(routes_module.table_api).parameters["format"]
+    assert format_param.default.default == "records"
+    resp = asyncio.run(routes_module.table_api("t", limit=10))
+    body = json.loads(resp.body)
+    assert body["data"] == records
+    assert "columns" not in body
+
+
+def test_write_csv_fast_round_trips(tmp_path):
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y, z"], "c": [0.5, float("nan")]})
+    path = tmp_path / "out.csv"
+    routes_module._write_csv_fast(df, path)
+    pd.testing.assert_frame_equal(pd.read_csv(path), df)
+    assert path.read_text() == df.to_csv(index=False)
+    assert [p.name for p in tmp_path.iterdir()] == ["out.csv"]
+
+
+def test_read_csv_fast_pyarrow_matches_c_parser_dtypes(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(routes_module, "CSV_ENGINE", "pyarrow")
+    path = tmp_path / "in.csv"
+    path.write_text(
+        "i,f,s,b,d,empty\n"
+        "1,1.5,a,True,2024-01-01,\n"
+        "2,,\"b, c\",False,2024-01-02,\n"
+    )
+
+    fast = routes_module._read_csv_fast(path)
+    slow = pd.read_csv(path)
+    pd.testing.assert_frame_equal(fast.drop(columns="d"), slow.drop(columns="d"))
+    # ISO dates are the documented exception: parsed by pyarrow only
+    assert fast["d"].map(str).tolist() == slow["d"].tolist()
+
+    fast = routes_module._read_csv_fast(path, skip_rows=1, usecols=[0, 1])
+    pd.testing.assert_frame_equal(fast, pd.read_csv(path, skiprows=1, usecols=[0, 1]))
+
+
+def test_source_preview_response_matches_template_render():
+    from fastapi.templating import Jinja2Templates
+
+    request = DummyRequest()
+    request.app.state.templates = Jinja2Templates(
+        directory=str(routes_module.BASE_DIR / "templates")
+    )
+    template = request.app.state.templates.get_template("partials/source_preview.html")
+
+    for body in ("<p>first</p>", "<table></table>"):
+        expected = template.render(
+            {"request": request, "source_id": 5, "preview_html": body}
+        )
+        resp = routes_module._source_preview_response(request, 5, body)
+        assert resp.body.decode() == expected
+
+
+def test_get_df_writes_sidecar_after_csv_parse(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(routes_module, "DATA_SOURCES_DIR", tmp_path)
+    source_id = 4
+    pd.DataFrame({"x": [1, 2]}).to_csv(tmp_path / f"source_{source_id}.csv", index=False)
+
+    first = routes_module.get_df(DummyRequest(), source_id)
+    assert (tmp_path / f"source_{source_id}.feather").exists()
+
+    # The next cold load comes from the sidecar, not the CSV parser
+    def no_csv(*args, **kwargs):
+        raise AssertionError("CSV should not be parsed again")
+
+    monkeypatch.setattr(routes_module, "_read_csv_fast", no_csv)
+    second = routes_module.get_df(DummyRequest(), source_id)
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_read_source_file_ignores_sidecar_without_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(routes_module, "DATA_SOURCES_DIR", tmp_path)
+    routes_module._sidecar_path(6).write_bytes(b"stale")
+
+    assert routes_module._read_source_file(6) is None
+
+
+def test_visualize_payload_cached_until_plotted_values_change():
+    df = pd.DataFrame({"n": [1.0, 2.0], "c": ["a", "b"]})
+
+    first = routes_module._visualize_payload(df, "viz_table", 2000)
+    assert routes_module._visualize_payload(df.copy(), "viz_table", 2000) is first
+
+    # Same shape and columns, different contents (e.g. another worker
+    # reloaded the table)
+    changed = pd.DataFrame({"n": [1.0, 3.0], "c": ["a", "b"]})
+    rebuilt = routes_module._visualize_payload(changed, "viz_table", 2000)
+    assert rebuilt is not first
+    assert "3.0" in rebuilt[0]
+
+    reordered = df.iloc[::-1].reset_index(drop=True)
+    assert routes_module._visualize_payload(reordered, "viz_table", 2000) is not first
+
+
+def test_top_counts_orders_by_count_then_first_appearance():
+    series = pd.Series(["c", "b", "a", "b", "a", "c", "d", "a"])
+
+    labels, counts = routes_module._top_counts(series, 3)
+
+    assert labels == ["a", "c", "b"]
+    assert counts.tolist() == [3, 2, 2]
+
+
+def test_visualize_payload_is_safe_inside_script_tags():
+    import json
+
+    df = pd.DataFrame({"</script><script>x": ["a<b", "a<b"]})
+
+    _, categorical_json = routes_module._visualize_payload(df, "xss_table", 2000)
+
+    assert "<" not in categorical_json
+    assert json.loads(str(categorical_json))[0]["labels"] == ["a<b"]